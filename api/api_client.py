@@ -2,18 +2,147 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import requests
-from typing import Dict, List, Optional
-from client_bot.config import KOMPEGE_API_URL
+import asyncio
+import functools
+import hashlib
+import html
+import json
+import aiohttp
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from client_bot.config import (
+    KOMPEGE_API_URL,
+    KOMPEGE_TIMEOUT,
+    KOMPEGE_MAX_CONNECTIONS,
+    KOMPEGE_CONNECTIONS_PER_HOST,
+    KOMPEGE_KEEPALIVE_TIMEOUT,
+    KOMPEGE_CACHE_SIZE,
+    KOMPEGE_CACHE_TTL,
+    KOMPEGE_LIST_CONCURRENCY,
+    KOMPEGE_LIST_DEADLINE
+)
+from api.cache import TTLCache
+from backend.crud import KimSnapshotCRUD
+
+
+class Variant:
+    """Разобранные данные варианта kompege.ru с индексом заданий по ID"""
+
+    def __init__(self, kim: int, data: Dict):
+        """
+        Разобрать ответ API один раз при загрузке
+
+        Args:
+            kim: ID варианта (KIM)
+            data: Ответ API /variant/kim/{kim}
+        """
+        self.kim = kim
+        self.data = data
+        self.description = data.get('description', f'Домашняя работа {kim}')
+        self.tasks: List[Dict] = data.get('tasks', [])
+        self._tasks_by_id: Dict[int, Dict] = {
+            task.get('taskId'): task for task in self.tasks
+        }
+        # Текст заданий без HTML-экранирования (для промптов LLM)
+        self._task_texts: Dict[int, str] = {
+            task_id: html.unescape(task.get('text') or '')
+            for task_id, task in self._tasks_by_id.items()
+        }
+
+    def get_task(self, task_id: int) -> Optional[Dict]:
+        """Получить задание по ID или None"""
+        return self._tasks_by_id.get(task_id)
+
+    def get_task_text(self, task_id: int) -> str:
+        """Получить текст задания без HTML-экранирования"""
+        return self._task_texts.get(task_id, '')
+
+    def __repr__(self):
+        return f"<Variant(kim={self.kim}, tasks={len(self.tasks)})>"
 
 
 class KompegeAPI:
     """Клиент для работы с API kompege.ru"""
 
-    @staticmethod
-    def get_homework_data(kim: int) -> Optional[Dict]:
+    # Общая сессия с пулом соединений (одна на весь процесс)
+    _session: Optional[aiohttp.ClientSession] = None
+
+    # Кэш данных вариантов по KIM
+    _cache = TTLCache(maxsize=KOMPEGE_CACHE_SIZE, ttl=KOMPEGE_CACHE_TTL)
+
+    # Фоновые проверки актуальности сохранённых копий (KIM -> задача)
+    _revalidations: Dict[int, asyncio.Task] = {}
+
+    # Загрузки, не уложившиеся в дедлайн списка (догружаются в фоне)
+    _background: Set[asyncio.Task] = set()
+
+    @classmethod
+    async def start(cls) -> None:
+        """Создать общую HTTP-сессию (вызывается при запуске бота)"""
+        if cls._session is not None and not cls._session.closed:
+            return
+
+        connector = aiohttp.TCPConnector(
+            limit=KOMPEGE_MAX_CONNECTIONS,
+            limit_per_host=KOMPEGE_CONNECTIONS_PER_HOST,
+            keepalive_timeout=KOMPEGE_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=300
+        )
+        cls._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=KOMPEGE_TIMEOUT),
+            headers={'Accept': 'application/json'}
+        )
+
+    @classmethod
+    async def close(cls) -> None:
+        """Закрыть общую HTTP-сессию (вызывается при остановке бота)"""
+        for task in list(cls._revalidations.values()) + list(cls._background):
+            task.cancel()
+        if cls._session is not None and not cls._session.closed:
+            await cls._session.close()
+        cls._session = None
+
+    @classmethod
+    async def _get_session(cls) -> aiohttp.ClientSession:
+        """Получить общую сессию, создав её при первом обращении"""
+        if cls._session is None or cls._session.closed:
+            await cls.start()
+        return cls._session
+
+    @classmethod
+    async def get_homework_data(cls, kim: int) -> Optional[Dict]:
+        """
+        Получает данные о домашней работе по KIM (с кэшированием)
+
+        Args:
+            kim: ID варианта (KIM)
+
+        Returns:
+            Словарь с данными или None в случае ошибки
+        """
+        variant = await cls.get_variant(kim)
+        return variant.data if variant else None
+
+    @classmethod
+    async def get_variant(cls, kim: int) -> Optional['Variant']:
         """
-        Получает данные о домашней работе по KIM
+        Получает разобранный вариант по KIM (с кэшированием)
+
+        Args:
+            kim: ID варианта (KIM)
+
+        Returns:
+            Вариант или None в случае ошибки
+        """
+        return await cls._cache.get_or_load(kim, lambda: cls._load_variant(kim))
+
+    @classmethod
+    async def refresh_homework_data(cls, kim: int) -> Optional[Dict]:
+        """
+        Получает актуальные данные о домашней работе, проверяя сохранённую
+        копию условным запросом (без фоновой отложенной проверки)
+
+        Если kompege.ru недоступен, возвращает сохранённую копию.
 
         Args:
             kim: ID варианта (KIM)
@@ -21,17 +150,127 @@ class KompegeAPI:
         Returns:
             Словарь с данными или None в случае ошибки
         """
+        snapshot = await KimSnapshotCRUD.get_snapshot(kim)
+        etag = snapshot.etag if snapshot else None
+        last_modified = snapshot.last_modified if snapshot else None
+
+        status, data = await cls._fetch_homework_data(kim, etag, last_modified)
+        if data is None and snapshot:
+            try:
+                data = json.loads(snapshot.payload)
+            except ValueError:
+                data = None
+
+        if data is not None:
+            cls._cache.set(kim, Variant(kim, data))
+        return data
+
+    @classmethod
+    async def _load_variant(cls, kim: int) -> Optional['Variant']:
+        """
+        Загружает данные варианта: из сохранённой копии в БД, а если её
+        нет - с kompege.ru
+
+        Сохранённая копия отдаётся сразу, а её актуальность проверяется
+        в фоне условным запросом.
+
+        Args:
+            kim: ID варианта (KIM)
+
+        Returns:
+            Вариант или None в случае ошибки
+        """
+        snapshot = await KimSnapshotCRUD.get_snapshot(kim)
+        if snapshot:
+            try:
+                data = json.loads(snapshot.payload)
+            except ValueError as e:
+                print(f"Повреждённая копия варианта KIM {kim}: {e}")
+            else:
+                cls._schedule_revalidation(kim, snapshot.etag, snapshot.last_modified)
+                return Variant(kim, data)
+
+        status, data = await cls._fetch_homework_data(kim)
+        return Variant(kim, data) if status == 200 else None
+
+    @classmethod
+    async def _fetch_homework_data(cls, kim: int, etag: Optional[str] = None,
+                                   last_modified: Optional[str] = None) -> Tuple[int, Optional[Dict]]:
+        """
+        Загружает данные о домашней работе с kompege.ru и сохраняет копию в БД
+
+        Args:
+            kim: ID варианта (KIM)
+            etag: ETag сохранённой копии (для условного запроса)
+            last_modified: Last-Modified сохранённой копии (для условного запроса)
+
+        Returns:
+            Кортеж (HTTP-статус, данные); статус 0 и None в случае ошибки,
+            304 и None если копия актуальна
+        """
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
         try:
             url = f"{KOMPEGE_API_URL}{kim}"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            session = await cls._get_session()
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304:
+                    await KimSnapshotCRUD.touch_snapshot(kim)
+                    return 304, None
+
+                response.raise_for_status()
+                body = await response.read()
+                data = json.loads(body)
+
+                await KimSnapshotCRUD.save_snapshot(
+                    kim=kim,
+                    payload=body.decode('utf-8'),
+                    payload_hash=hashlib.sha256(body).hexdigest(),
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified')
+                )
+                return 200, data
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
             print(f"Ошибка при получении данных для KIM {kim}: {e}")
-            return None
+            return 0, None
+
+    @classmethod
+    def _schedule_revalidation(cls, kim: int, etag: Optional[str],
+                               last_modified: Optional[str]) -> None:
+        """
+        Запустить фоновую проверку актуальности сохранённой копии варианта
+
+        Args:
+            kim: ID варианта (KIM)
+            etag: ETag сохранённой копии
+            last_modified: Last-Modified сохранённой копии
+        """
+        if kim in cls._revalidations:
+            return
+
+        task = asyncio.create_task(cls._revalidate(kim, etag, last_modified))
+        cls._revalidations[kim] = task
+        task.add_done_callback(lambda _: cls._revalidations.pop(kim, None))
+
+    @classmethod
+    async def _revalidate(cls, kim: int, etag: Optional[str],
+                          last_modified: Optional[str]) -> None:
+        """
+        Проверить актуальность копии варианта условным запросом
 
-    @staticmethod
-    def get_tasks(kim: int) -> List[Dict]:
+        Если вариант изменился - обновляет копию в БД и кэш в памяти.
+        Если kompege.ru недоступен - продолжаем работать со старой копией.
+        """
+        status, data = await cls._fetch_homework_data(kim, etag, last_modified)
+        if status == 200 and data is not None:
+            cls._cache.set(kim, Variant(kim, data))
+
+    @classmethod
+    async def get_tasks(cls, kim: int) -> List[Dict]:
         """
         Получает список задач для домашней работы
 
@@ -41,13 +280,13 @@ class KompegeAPI:
         Returns:
             Список задач
         """
-        data = KompegeAPI.get_homework_data(kim)
-        if data:
-            return data.get('tasks', [])
+        variant = await cls.get_variant(kim)
+        if variant:
+            return variant.tasks
         return []
 
-    @staticmethod
-    def get_description(kim: int) -> str:
+    @classmethod
+    async def get_description(cls, kim: int) -> str:
         """
         Получает описание домашней работы
 
@@ -57,7 +296,67 @@ class KompegeAPI:
         Returns:
             Описание работы
         """
-        data = KompegeAPI.get_homework_data(kim)
-        if data:
-            return data.get('description', f'Домашняя работа {kim}')
+        variant = await cls.get_variant(kim)
+        if variant:
+            return variant.description
         return f'Домашняя работа {kim}'
+
+    @classmethod
+    async def get_descriptions(cls, kims: Iterable[int],
+                               concurrency: int = KOMPEGE_LIST_CONCURRENCY,
+                               deadline: float = KOMPEGE_LIST_DEADLINE) -> Dict[int, str]:
+        """
+        Получает описания нескольких домашних работ параллельно
+
+        Одновременно выполняется не более concurrency запросов. Работы, не
+        успевшие загрузиться за deadline секунд, получают описание по
+        умолчанию, а их загрузка продолжается в фоне и прогревает кэш.
+
+        Args:
+            kims: ID вариантов (KIM)
+            concurrency: Максимальное количество одновременных запросов
+            deadline: Общее время ожидания в секундах
+
+        Returns:
+            Словарь KIM -> описание
+        """
+        kims = list(dict.fromkeys(kims))
+        descriptions = {kim: f'Домашняя работа {kim}' for kim in kims}
+        if not kims:
+            return descriptions
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def load(kim: int) -> str:
+            async with semaphore:
+                return await cls.get_description(kim)
+
+        tasks = {asyncio.create_task(load(kim)): kim for kim in kims}
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+
+        for task in done:
+            if not task.cancelled() and task.exception() is None:
+                descriptions[tasks[task]] = task.result()
+
+        for task in pending:
+            cls._background.add(task)
+            task.add_done_callback(functools.partial(cls._background_done, tasks[task]))
+
+        return descriptions
+
+    @classmethod
+    def _background_done(cls, kim: int, task: asyncio.Task) -> None:
+        """Забыть завершённую фоновую загрузку и забрать её исключение"""
+        cls._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Ошибка фоновой загрузки описания KIM {kim}: {task.exception()}")
+
+    @classmethod
+    def cache_stats(cls) -> dict:
+        """
+        Получить статистику кэша вариантов
+
+        Returns:
+            Словарь со статистикой (размер, попадания, промахи)
+        """
+        return cls._cache.stats()
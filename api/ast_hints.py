@@ -0,0 +1,253 @@
+"""
+Шаблонные подсказки по структурным отличиям кода студента от эталона
+
+Код студента и эталонные решения разбираются через ast, из деревьев
+извлекаются признаки (циклы, условия, вызовы, операторы сравнения, границы
+range). Код сравнивается с ближайшим по признакам эталоном; если найдено
+типичное структурное отличие, подсказка выдаётся по шаблону без обращения
+к модели.
+"""
+
+import ast
+from collections import Counter
+from typing import Callable, List, Optional, Tuple
+
+# Пары операторов сравнения, которые часто путают
+_SWAPPED_COMPARISONS = {
+    'Lt': 'LtE', 'LtE': 'Lt',
+    'Gt': 'GtE', 'GtE': 'Gt',
+    'Eq': 'NotEq', 'NotEq': 'Eq',
+}
+
+
+class _CodeShape:
+    """Признаки программы, существенные для шаблонных подсказок"""
+
+    def __init__(self, tree: ast.AST):
+        self.features = Counter()
+        self.ranges: List[Tuple[int, ...]] = []
+        self.function_returns: List[bool] = []
+
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.For, ast.While)):
+                self.features['loop'] += 1
+            elif isinstance(node, ast.comprehension):
+                self.features['loop'] += 1
+                self.features['condition'] += len(node.ifs)
+            elif isinstance(node, (ast.If, ast.IfExp)):
+                self.features['condition'] += 1
+            elif isinstance(node, ast.Compare):
+                for op in node.ops:
+                    self.features[f'cmp:{type(op).__name__}'] += 1
+            elif isinstance(node, (ast.BinOp, ast.AugAssign)):
+                self.features[f'op:{type(node.op).__name__}'] += 1
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self.features['def'] += 1
+                self.function_returns.append(any(
+                    isinstance(child, ast.Return) and child.value is not None
+                    for child in ast.walk(node)
+                ))
+            elif isinstance(node, ast.Call):
+                self._add_call(node)
+            elif isinstance(node, ast.Attribute) and node.attr == 'stdin':
+                self.features['stdin'] += 1
+
+    def _add_call(self, node: ast.Call) -> None:
+        if isinstance(node.func, ast.Name):
+            self.features[f'call:{node.func.id}'] += 1
+            if node.func.id == 'range' and not node.keywords:
+                bounds = [_int_constant(arg) for arg in node.args]
+                if bounds and None not in bounds:
+                    self.ranges.append(tuple(bounds))
+        elif isinstance(node.func, ast.Attribute):
+            self.features[f'method:{node.func.attr}'] += 1
+            if _dotted_name(node.func) == 'sys.stdout.write':
+                self.features['call:sys.stdout.write'] += 1
+
+    def count(self, name: str) -> int:
+        return self.features[name]
+
+    def reads_input(self) -> bool:
+        return bool(self.count('call:input') or self.count('stdin') or self.count('call:open'))
+
+    def writes_output(self) -> bool:
+        return bool(self.count('call:print') or self.count('call:sys.stdout.write'))
+
+    def distance(self, other: '_CodeShape') -> int:
+        """Расстояние между программами по признакам (меньше - похожее)"""
+        keys = set(self.features) | set(other.features)
+        return sum(abs(self.features[key] - other.features[key]) for key in keys)
+
+
+def _int_constant(node: ast.AST) -> Optional[int]:
+    """Значение целочисленной константы (в том числе отрицательной) или None"""
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        value = _int_constant(node.operand)
+        return -value if value is not None else None
+    if isinstance(node, ast.Constant) and type(node.value) is int:
+        return node.value
+    return None
+
+
+def _dotted_name(node: ast.AST) -> str:
+    """Полное имя атрибута вида sys.stdin.readline (или пустая строка)"""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        parts.append(node.id)
+        return ".".join(reversed(parts))
+    return ""
+
+
+def _parse(code: str) -> Optional[_CodeShape]:
+    """Разобрать код (None, если он не разбирается)"""
+    try:
+        return _CodeShape(ast.parse(code))
+    except (SyntaxError, ValueError):
+        return None
+
+
+def _no_output(student: _CodeShape, reference: _CodeShape) -> Optional[str]:
+    if reference.writes_output() and not student.writes_output():
+        return "Ваша программа ничего не выводит: не забудьте напечатать результат с помощью print()."
+    return None
+
+
+def _no_file(student: _CodeShape, reference: _CodeShape) -> Optional[str]:
+    if reference.count('call:open') and not student.count('call:open'):
+        return "В этой задаче данные нужно прочитать из файла: подумайте, как открыть его с помощью open()."
+    return None
+
+
+def _no_input(student: _CodeShape, reference: _CodeShape) -> Optional[str]:
+    if reference.reads_input() and not student.reads_input():
+        return "Программа не читает входные данные: подумайте, где в вашем коде должен быть input()."
+    return None
+
+
+def _no_loop(student: _CodeShape, reference: _CodeShape) -> Optional[str]:
+    if reference.count('loop') and not student.count('loop'):
+        return "Здесь нужно перебрать много значений: подумайте, какой цикл пройдёт по всем вариантам."
+    return None
+
+
+def _no_condition(student: _CodeShape, reference: _CodeShape) -> Optional[str]:
+    if reference.count('condition') and not student.count('condition'):
+        return "Не хватает проверки условия: подумайте, какие значения нужно отобрать с помощью if."
+    return None
+
+
+def _no_return(student: _CodeShape, reference: _CodeShape) -> Optional[str]:
+    if any(reference.function_returns) and student.function_returns and not any(student.function_returns):
+        return "Ваша функция ничего не возвращает: не хватает return с результатом."
+    return None
+
+
+def _range_bounds(student: _CodeShape, reference: _CodeShape) -> Optional[str]:
+    if len(student.ranges) != len(reference.ranges):
+        return None
+    for own, expected in zip(student.ranges, reference.ranges):
+        if len(own) != len(expected):
+            continue
+        differences = [abs(a - b) for a, b in zip(own, expected) if a != b]
+        if differences == [1]:
+            return (
+                "Проверьте границы range(): правая граница в диапазон не входит, "
+                "а левая по умолчанию равна нулю."
+            )
+    return None
+
+
+def _comparison(student: _CodeShape, reference: _CodeShape) -> Optional[str]:
+    for op, swapped in _SWAPPED_COMPARISONS.items():
+        own_op, own_swapped = student.count(f'cmp:{op}'), student.count(f'cmp:{swapped}')
+        ref_op, ref_swapped = reference.count(f'cmp:{op}'), reference.count(f'cmp:{swapped}')
+        # Одно сравнение заменено на парное, остальные совпадают
+        if own_op == ref_op - 1 and own_swapped == ref_swapped + 1:
+            if op in ('Eq', 'NotEq'):
+                return "Проверьте условие: возможно, сравнение должно быть противоположным (== или !=)."
+            return "Проверьте знак сравнения в условии: здесь важно, строгое неравенство нужно или нестрогое."
+    return None
+
+
+def _floor_division(student: _CodeShape, reference: _CodeShape) -> Optional[str]:
+    if reference.count('op:FloorDiv') and not student.count('op:FloorDiv') and student.count('op:Div'):
+        return "Обычное деление / даёт дробное число, а для целочисленного деления используется //."
+    return None
+
+
+# Правила в порядке приоритета: (название, проверка)
+RULES: List[Tuple[str, Callable[[_CodeShape, _CodeShape], Optional[str]]]] = [
+    ('no_output', _no_output),
+    ('no_file', _no_file),
+    ('no_input', _no_input),
+    ('no_loop', _no_loop),
+    ('no_condition', _no_condition),
+    ('no_return', _no_return),
+    ('range_bounds', _range_bounds),
+    ('comparison', _comparison),
+    ('floor_division', _floor_division),
+]
+
+# Правила, которые считают ошибкой любое отличие от формы эталона. Верное
+# решение другой формы (sum(range(...)) вместо цикла, n <= 9 вместо n < 10)
+# тоже под них попадает, поэтому они применяются только к коду, не
+# прошедшему тесты
+SHAPE_RULES = {'no_loop', 'no_condition', 'range_bounds', 'comparison'}
+
+
+class StructuralHints:
+    """Шаблонные подсказки со статистикой срабатываний"""
+
+    def __init__(self):
+        self.checks = 0
+        self.hits = 0
+        self.rules = Counter()
+
+    def check(self, code: str, references: List[str],
+              tests_failed: bool = False) -> Optional[Tuple[str, str]]:
+        """
+        Найти типичное структурное отличие кода от ближайшего эталона
+
+        Args:
+            code: Код студента
+            references: Эталонные решения задачи
+            tests_failed: Код не прошёл тесты в песочнице (False - проверки
+                          не было, правила из SHAPE_RULES не применяются)
+
+        Returns:
+            Кортеж (название правила, подсказка) или None, если ни одно
+            правило не сработало
+        """
+        self.checks += 1
+        student = _parse(code)
+        shapes = [shape for shape in map(_parse, references) if shape is not None]
+        if student is None or not shapes:
+            return None
+
+        reference = min(shapes, key=student.distance)
+        for name, rule in RULES:
+            if name in SHAPE_RULES and not tests_failed:
+                continue
+            hint = rule(student, reference)
+            if hint:
+                self.hits += 1
+                self.rules[name] += 1
+                return name, hint
+        return None
+
+    def stats(self) -> dict:
+        """
+        Получить статистику срабатываний
+
+        Returns:
+            Словарь {checks, hits, hit_rate, rules}
+        """
+        return {
+            'checks': self.checks,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.checks if self.checks else 0.0,
+            'rules': dict(self.rules.most_common())
+        }
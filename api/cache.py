@@ -0,0 +1,153 @@
+"""
+In-process кэш с TTL, LRU-вытеснением и объединением одновременных запросов
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """Ограниченный по размеру кэш с временем жизни записей и LRU-вытеснением"""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        """
+        Инициализация кэша
+
+        Args:
+            maxsize: Максимальное количество записей
+            ttl: Время жизни записи в секундах
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Получить значение из кэша
+
+        Args:
+            key: Ключ записи
+
+        Returns:
+            Значение или None, если записи нет или она устарела
+        """
+        value = self._lookup(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def _lookup(self, key: Hashable) -> Optional[Any]:
+        """Найти актуальное значение, не изменяя статистику"""
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Сохранить значение в кэш
+
+        Args:
+            key: Ключ записи
+            value: Значение
+        """
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Удалить запись из кэша"""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Очистить кэш"""
+        self._data.clear()
+
+    async def get_or_load(self, key: Hashable,
+                          loader: Callable[[], Awaitable[Any]]) -> Optional[Any]:
+        """
+        Получить значение из кэша или загрузить его
+
+        Одновременные промахи по одному ключу объединяются: загрузчик
+        вызывается один раз, остальные ждут его результата.
+        None не кэшируется. В статистике каждый вызов учитывается один раз:
+        вызвавший загрузчик - промах, получивший готовое значение или
+        результат чужой загрузки - попадание.
+
+        Args:
+            key: Ключ записи
+            loader: Корутина-фабрика, загружающая значение
+
+        Returns:
+            Значение или None
+        """
+        while True:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                return value
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            try:
+                value = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Отменили загрузку другого запроса - пробуем заново сами
+                if inflight.cancelled():
+                    continue
+                raise
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Исключение уже передано ожидающим, не оставляем его "неполученным"
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        if value is not None:
+            self.set(key, value)
+        future.set_result(value)
+        return value
+
+    def stats(self) -> dict:
+        """
+        Получить статистику кэша
+
+        Returns:
+            Словарь со статистикой
+        """
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total * 100, 1) if total else 0
+        }
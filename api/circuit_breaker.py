@@ -0,0 +1,186 @@
+"""
+Circuit breaker для запросов к внешнему сервису: следит за долей ошибок и
+задержками и временно перестаёт пропускать запросы к деградировавшей модели
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from collections import deque
+from typing import Optional
+from client_bot.config import (
+    CIRCUIT_WINDOW,
+    CIRCUIT_MIN_CALLS,
+    CIRCUIT_ERROR_THRESHOLD,
+    CIRCUIT_SLOW_CALL_SECONDS,
+    CIRCUIT_OPEN_SECONDS
+)
+
+
+class CircuitOpenError(Exception):
+    """Запрос отклонён: все модели временно недоступны"""
+
+
+class CircuitBreaker:
+    """Circuit breaker со скользящим окном последних вызовов
+
+    Состояния:
+        closed - запросы проходят, результаты учитываются в окне;
+        open - запросы отклоняются сразу, пока не пройдёт open_seconds;
+        half_open - пропускается один пробный запрос, по его итогу
+                    breaker закрывается или снова открывается.
+
+    Медленные вызовы (дольше slow_call_seconds) считаются неудачными.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, window: int = CIRCUIT_WINDOW,
+                 min_calls: int = CIRCUIT_MIN_CALLS,
+                 error_threshold: float = CIRCUIT_ERROR_THRESHOLD,
+                 slow_call_seconds: float = CIRCUIT_SLOW_CALL_SECONDS,
+                 open_seconds: float = CIRCUIT_OPEN_SECONDS):
+        """
+        Инициализация breaker
+
+        Args:
+            name: Название (для логов и статистики)
+            window: Количество последних вызовов в окне
+            min_calls: Минимум вызовов в окне для оценки доли ошибок
+            error_threshold: Доля неудачных вызовов, при которой breaker открывается
+            slow_call_seconds: Вызовы дольше этого считаются неудачными
+            open_seconds: Сколько секунд breaker остаётся открытым
+        """
+        self.name = name
+        self.min_calls = min_calls
+        self.error_threshold = error_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self._outcomes = deque(maxlen=window)  # True - успех, False - ошибка
+        self._latencies = deque(maxlen=window)  # задержки успешных вызовов
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def is_open(self) -> bool:
+        """Breaker открыт и пробный запрос ещё не разрешён"""
+        return self.state == self.OPEN and time.monotonic() - self._opened_at < self.open_seconds
+
+    def allow_request(self) -> bool:
+        """
+        Можно ли выполнить запрос (в состоянии half_open занимает пробный запрос)
+
+        Returns:
+            True если запрос разрешён
+        """
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self, latency: float) -> None:
+        """Учесть успешный вызов"""
+        if latency > self.slow_call_seconds:
+            self.record_failure(latency)
+            return
+
+        self._latencies.append(latency)
+        if self.state == self.HALF_OPEN:
+            self._close()
+        self._outcomes.append(True)
+
+    def record_failure(self, latency: float) -> None:
+        """Учесть неудачный (или слишком медленный) вызов"""
+        if self.state == self.HALF_OPEN:
+            self._open()
+            return
+
+        self._outcomes.append(False)
+        if len(self._outcomes) >= self.min_calls and self.error_rate() >= self.error_threshold:
+            self._open()
+
+    def record_cancel(self, latency: float = 0.0, slow_after: Optional[float] = None) -> None:
+        """
+        Учесть отменённый вызов
+
+        Быстро отменённый вызов на статистику не влияет. Вызов, отменённый
+        позже slow_after (например, проигравший хеджированный запрос) или
+        slow_call_seconds, считается медленным: время до отмены - нижняя
+        оценка его задержки.
+
+        Args:
+            latency: Сколько секунд вызов выполнялся до отмены
+            slow_after: Порог медленного вызова (по умолчанию slow_call_seconds)
+        """
+        threshold = self.slow_call_seconds if slow_after is None else min(slow_after, self.slow_call_seconds)
+        if latency > threshold:
+            self._latencies.append(latency)
+            self.record_failure(latency)
+            return
+
+        if self.state == self.HALF_OPEN:
+            self._probe_in_flight = False
+
+    def error_rate(self) -> float:
+        """Доля неудачных вызовов в окне"""
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def latency_percentile(self, percentile: float, min_samples: int = 1) -> Optional[float]:
+        """
+        Перцентиль задержки успешных вызовов
+
+        Args:
+            percentile: Перцентиль (0-100)
+            min_samples: Минимальное количество замеров
+
+        Returns:
+            Задержка в секундах или None, если замеров недостаточно
+        """
+        if len(self._latencies) < max(1, min_samples):
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def stats(self) -> dict:
+        """
+        Получить статистику breaker
+
+        Returns:
+            Словарь с состоянием, долей ошибок и перцентилями задержки
+        """
+        return {
+            'name': self.name,
+            'state': self.state,
+            'calls': len(self._outcomes),
+            'error_rate': round(self.error_rate(), 3),
+            'p50': self.latency_percentile(50),
+            'p95': self.latency_percentile(95)
+        }
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        print(f"Circuit breaker {self.name}: открыт (ошибок {self.error_rate():.0%})")
+
+    def _close(self) -> None:
+        self.state = self.CLOSED
+        self._outcomes.clear()
+        self._probe_in_flight = False
+        print(f"Circuit breaker {self.name}: закрыт")
@@ -0,0 +1,108 @@
+"""
+Нормализация кода студента для поиска эквивалентных решений
+
+Код разбирается через ast, поэтому пробелы, комментарии и docstring'и не
+влияют на результат, а пользовательские идентификаторы заменяются на
+канонические имена (v0, v1, ...) в порядке первого появления.
+"""
+
+import ast
+import builtins
+import hashlib
+
+# Имена встроенных функций не переименовываем: print и len - разные программы
+_BUILTIN_NAMES = frozenset(dir(builtins))
+
+
+class _IdentifierCanonicalizer(ast.NodeTransformer):
+    """Заменяет пользовательские идентификаторы на канонические имена"""
+
+    def __init__(self):
+        self._names = {}
+
+    def _canonical(self, name: str) -> str:
+        if name in _BUILTIN_NAMES:
+            return name
+        if name not in self._names:
+            self._names[name] = f"v{len(self._names)}"
+        return self._names[name]
+
+    def visit_Name(self, node: ast.Name) -> ast.Name:
+        node.id = self._canonical(node.id)
+        return node
+
+    def visit_arg(self, node: ast.arg) -> ast.arg:
+        node.arg = self._canonical(node.arg)
+        node.annotation = None
+        return node
+
+    def _visit_function(self, node):
+        node.name = self._canonical(node.name)
+        node.returns = None
+        _strip_docstring(node)
+        self.generic_visit(node)
+        return node
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> ast.ClassDef:
+        node.name = self._canonical(node.name)
+        _strip_docstring(node)
+        self.generic_visit(node)
+        return node
+
+    def visit_Global(self, node: ast.Global) -> ast.Global:
+        node.names = [self._canonical(name) for name in node.names]
+        return node
+
+    visit_Nonlocal = visit_Global
+
+
+def _strip_docstring(node) -> None:
+    """Удалить docstring из тела модуля, функции или класса"""
+    body = node.body
+    if (body and isinstance(body[0], ast.Expr)
+            and isinstance(body[0].value, ast.Constant)
+            and isinstance(body[0].value.value, str)):
+        node.body = body[1:] or [ast.Pass()]
+
+
+def normalize_code(code: str) -> str:
+    """
+    Привести код к нормальной форме
+
+    Если код не разбирается, нормальная форма - текст без пустых строк,
+    строк-комментариев и концевых пробелов.
+
+    Args:
+        code: Исходный код
+
+    Returns:
+        Нормализованное представление кода
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        lines = (line.rstrip() for line in code.splitlines())
+        return "\n".join(
+            line for line in lines
+            if line.strip() and not line.lstrip().startswith('#')
+        )
+
+    _strip_docstring(tree)
+    tree = _IdentifierCanonicalizer().visit(tree)
+    return ast.dump(tree, annotate_fields=False)
+
+
+def normalized_code_hash(code: str) -> str:
+    """
+    Хэш нормализованного кода
+
+    Args:
+        code: Исходный код
+
+    Returns:
+        SHA-256 нормальной формы кода
+    """
+    return hashlib.sha256(normalize_code(code).encode('utf-8')).hexdigest()
@@ -0,0 +1,113 @@
+"""
+Предварительная генерация подсказок "Как начать?" для домашних работ
+
+Запуск из командной строки:
+    python api/hint_warmup.py KIM [KIM ...]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+from typing import Awaitable, Callable, Optional
+from api.api_client import KompegeAPI
+from api.openrouter_client import get_openrouter_client, close_openrouter_client
+from backend.crud import SolutionCRUD
+from backend.database import async_engine
+from client_bot.config import HINT_WARMUP_CONCURRENCY
+
+ProgressCallback = Callable[[dict], Awaitable[None]]
+
+
+async def warm_homework_hints(kim: int, concurrency: int = HINT_WARMUP_CONCURRENCY,
+                              on_progress: Optional[ProgressCallback] = None) -> dict:
+    """
+    Сгенерировать подсказки "Как начать?" для всех заданий варианта,
+    у которых есть эталонные решения
+
+    Args:
+        kim: ID варианта (KIM)
+        concurrency: Максимальное количество одновременных запросов к модели
+        on_progress: Корутина, вызываемая с текущим отчётом после каждого задания
+
+    Returns:
+        Отчёт: total, done, generated, cached, failed, prompt_tokens, completion_tokens
+    """
+    report = {
+        'kim': kim,
+        'total': 0,
+        'done': 0,
+        'generated': 0,
+        'cached': 0,
+        'failed': 0,
+        'prompt_tokens': 0,
+        'completion_tokens': 0
+    }
+
+    variant = await KompegeAPI.get_variant(kim)
+    if not variant:
+        return report
+
+    task_ids = [
+        task.get('taskId') for task in variant.tasks
+        if await SolutionCRUD.count_solutions_by_task(task.get('taskId'))
+    ]
+    report['total'] = len(task_ids)
+
+    client = get_openrouter_client()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def warm_one(task_id: int) -> None:
+        async with semaphore:
+            result = await client.warm_start_hint(task_id, variant.get_task_text(task_id))
+
+        if result['status'] in ('generated', 'cached'):
+            report[result['status']] += 1
+        else:
+            report['failed'] += 1
+        report['prompt_tokens'] += result['prompt_tokens']
+        report['completion_tokens'] += result['completion_tokens']
+        report['done'] += 1
+
+        if on_progress:
+            await on_progress(dict(report))
+
+    await asyncio.gather(*(warm_one(task_id) for task_id in task_ids))
+    return report
+
+
+def format_warmup_report(report: dict) -> str:
+    """Текст отчёта о прогреве подсказок"""
+    return (
+        f"KIM {report['kim']}: {report['done']}/{report['total']} "
+        f"(новых: {report['generated']}, готовых: {report['cached']}, ошибок: {report['failed']})\n"
+        f"Токены: {report['prompt_tokens']} + {report['completion_tokens']}"
+    )
+
+
+async def _main(kims: list, concurrency: int) -> None:
+    """Прогреть подсказки для нескольких вариантов из командной строки"""
+    async def print_progress(report: dict) -> None:
+        print(f"[{report['done']}/{report['total']}] KIM {report['kim']}")
+
+    try:
+        for kim in kims:
+            report = await warm_homework_hints(kim, concurrency, print_progress)
+            print(format_warmup_report(report))
+    finally:
+        await KompegeAPI.close()
+        await close_openrouter_client()
+        # Иначе соединения aiosqlite не дают процессу завершиться
+        await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Прогрев подсказок "Как начать?"')
+    parser.add_argument('kims', type=int, nargs='+', help='ID вариантов (KIM)')
+    parser.add_argument('--concurrency', type=int, default=HINT_WARMUP_CONCURRENCY,
+                        help='Количество одновременных запросов к модели')
+    args = parser.parse_args()
+
+    asyncio.run(_main(args.kims, args.concurrency))
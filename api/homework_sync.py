@@ -0,0 +1,82 @@
+"""
+Синхронизация сохранённых данных домашних работ с kompege.ru
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import logging
+from typing import Optional
+from api.api_client import KompegeAPI
+from backend.crud import HomeworkCRUD
+from backend.database import Homework
+from client_bot.config import HOMEWORK_SYNC_INTERVAL, KOMPEGE_LIST_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+
+async def sync_homework(kim: int) -> Optional[Homework]:
+    """
+    Обновить описание и список заданий домашней работы
+
+    Args:
+        kim: ID варианта (KIM)
+
+    Returns:
+        Обновленная домашняя работа или None, если данные не получены
+    """
+    data = await KompegeAPI.refresh_homework_data(kim)
+    if not data:
+        return None
+
+    description = data.get('description', f'Домашняя работа {kim}')
+    return await HomeworkCRUD.update_homework_catalog(kim, description, len(data.get('tasks', [])))
+
+
+async def sync_all_homeworks(concurrency: int = KOMPEGE_LIST_CONCURRENCY) -> int:
+    """
+    Синхронизировать все домашние работы
+
+    Args:
+        concurrency: Максимальное количество одновременных запросов
+
+    Returns:
+        Количество успешно синхронизированных работ
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def sync_one(kim: int) -> Optional[Homework]:
+        async with semaphore:
+            return await sync_homework(kim)
+
+    homeworks = await HomeworkCRUD.get_all_homeworks()
+    results = await asyncio.gather(
+        *(sync_one(hw.kim) for hw in homeworks),
+        return_exceptions=True
+    )
+
+    synced = 0
+    for hw, result in zip(homeworks, results):
+        if isinstance(result, Exception):
+            logger.error(f"Ошибка синхронизации KIM {hw.kim}: {result}")
+        elif result is not None:
+            synced += 1
+    return synced
+
+
+async def run_sync_loop(interval: float = HOMEWORK_SYNC_INTERVAL) -> None:
+    """
+    Периодически синхронизировать домашние работы (фоновая задача бота)
+
+    Args:
+        interval: Интервал между синхронизациями в секундах
+    """
+    while True:
+        try:
+            synced = await sync_all_homeworks()
+            logger.info(f"Синхронизировано домашних работ: {synced}")
+        except Exception as e:
+            logger.error(f"Ошибка синхронизации домашних работ: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,160 @@
+"""
+Планировщик запросов к LLM: глобальное ограничение одновременных запросов,
+очередь по приоритетам и справедливое (round-robin) чередование пользователей
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, List, Optional
+from client_bot.config import LLM_MAX_IN_FLIGHT
+
+# Типы запросов в порядке убывания приоритета
+PRIORITIES = ('analyze', 'start', 'warmup')
+
+
+class LLMScheduler:
+    """Ограничивает количество одновременных запросов к модели и распределяет
+    освободившиеся места между пользователями по очереди"""
+
+    def __init__(self, max_in_flight: int = LLM_MAX_IN_FLIGHT):
+        """
+        Инициализация планировщика
+
+        Args:
+            max_in_flight: Максимальное количество одновременных запросов
+        """
+        self.max_in_flight = max_in_flight
+        self._in_flight = 0
+        # Для каждого приоритета: user_id -> ожидающие запросы пользователя.
+        # Порядок ключей задаёт очередь пользователей для round-robin.
+        self._queues: Dict[str, "OrderedDict[int, Deque[asyncio.Future]]"] = {
+            kind: OrderedDict() for kind in PRIORITIES
+        }
+
+    @asynccontextmanager
+    async def slot(self, user_id: int, kind: str) -> AsyncIterator[None]:
+        """
+        Занять место для запроса к модели на время блока with
+
+        Args:
+            user_id: ID пользователя Telegram (0 - служебные запросы)
+            kind: Тип запроса ('analyze', 'start' или 'warmup')
+        """
+        await self._acquire(user_id, kind)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, user_id: int, kind: str) -> None:
+        """Дождаться свободного места"""
+        if self._in_flight < self.max_in_flight and not self.queue_depth():
+            self._in_flight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues[kind]
+        queue.setdefault(user_id, deque()).append(future)
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Место уже выдано - возвращаем его следующему
+                self._release()
+            else:
+                waiters = queue.get(user_id)
+                if waiters is not None and future in waiters:
+                    waiters.remove(future)
+                    if not waiters:
+                        del queue[user_id]
+            raise
+
+    def _release(self) -> None:
+        """Освободить место и передать его следующему в очереди"""
+        self._in_flight -= 1
+        while self._in_flight < self.max_in_flight:
+            future = self._next_waiter()
+            if future is None:
+                break
+            self._in_flight += 1
+            future.set_result(None)
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        """Следующий запрос: самый приоритетный тип, пользователи по кругу"""
+        for kind in PRIORITIES:
+            queue = self._queues[kind]
+            while queue:
+                user_id, waiters = next(iter(queue.items()))
+                future = waiters.popleft()
+                if waiters:
+                    queue.move_to_end(user_id)
+                else:
+                    del queue[user_id]
+                if not future.done():
+                    return future
+        return None
+
+    def queue_depth(self) -> int:
+        """Количество запросов, ожидающих места"""
+        return sum(
+            len(waiters)
+            for queue in self._queues.values()
+            for waiters in queue.values()
+        )
+
+    def in_flight(self) -> int:
+        """Количество выполняющихся запросов"""
+        return self._in_flight
+
+    def position(self, user_id: int, kind: str) -> int:
+        """
+        Оценить место нового запроса пользователя в очереди
+
+        Args:
+            user_id: ID пользователя Telegram
+            kind: Тип запроса
+
+        Returns:
+            0 если запрос начнёт выполняться сразу, иначе номер в очереди
+        """
+        if self._in_flight < self.max_in_flight and not self.queue_depth():
+            return 0
+
+        ahead = 0
+        for other_kind in PRIORITIES:
+            queue = self._queues[other_kind]
+            if other_kind != kind:
+                ahead += sum(len(waiters) for waiters in queue.values())
+                continue
+
+            # Новый запрос встанет в круг номер own_round: до него пройдут
+            # own_round запросов каждого пользователя (но не больше, чем у него есть)
+            own_round = len(queue.get(user_id, ()))
+            users: List[int] = list(queue.keys())
+            for other_user in users:
+                waiting = len(queue[other_user])
+                if other_user == user_id:
+                    ahead += waiting
+                else:
+                    ahead += min(waiting, own_round + 1)
+            break
+
+        return ahead + 1
+
+
+# Глобальный экземпляр планировщика
+_scheduler = None
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Получить глобальный экземпляр планировщика запросов к LLM"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler()
+    return _scheduler
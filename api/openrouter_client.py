@@ -6,9 +6,47 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from openai import OpenAI
-from typing import Optional
-from backend.crud import SolutionCRUD
+import asyncio
+import hashlib
+import time
+import httpx
+from openai import AsyncOpenAI
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from api.cache import TTLCache
+from api.circuit_breaker import CircuitBreaker, CircuitOpenError
+from api.code_normalizer import normalized_code_hash
+from api.llm_scheduler import get_llm_scheduler
+from api.token_budget import estimate_tokens, fit_parts
+from api.ast_hints import StructuralHints
+from backend.crud import SolutionCRUD, StartHintCacheCRUD, LLMCallCRUD
+from client_bot.config import (
+    OPENROUTER_CONNECT_TIMEOUT,
+    OPENROUTER_READ_TIMEOUT,
+    OPENROUTER_MAX_CONNECTIONS,
+    ANALYSIS_CACHE_SIZE,
+    ANALYSIS_CACHE_TTL,
+    OPENROUTER_MODEL,
+    OPENROUTER_FALLBACK_MODEL,
+    HEDGE_PERCENTILE,
+    HEDGE_MIN_SAMPLES,
+    LLM_PROMPT_TOKEN_BUDGET
+)
+
+SYSTEM_PROMPT = "You are a helpful programming tutor. Always reply in Russian."
+
+# Версия промпта подсказки "Как начать?" (увеличить при изменении промпта,
+# чтобы сохранённые подсказки перегенерировались)
+START_HINT_PROMPT_VERSION = 1
+
+# Ответ, когда модели недоступны (circuit breaker открыт)
+DEGRADED_HINT = (
+    "Сервис подсказок сейчас перегружен. Попробуйте через минуту, "
+    "а пока перечитайте условие и проверьте код на простом примере."
+)
+
+
+# Признак конца потока в очереди фрагментов _complete_stream
+_STREAM_END = object()
 
 
 class OpenRouterClient:
@@ -22,14 +60,372 @@ class OpenRouterClient:
             api_key: API ключ OpenRouter (если не указан, берется из .env)
         """
         self.api_key = api_key or os.getenv('OPENROUTER_API_KEY')
-        self.client = OpenAI(
+        timeout = httpx.Timeout(OPENROUTER_READ_TIMEOUT, connect=OPENROUTER_CONNECT_TIMEOUT)
+        # Общий пул HTTP-соединений для всех запросов к модели
+        self.http_client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=OPENROUTER_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENROUTER_MAX_CONNECTIONS
+            )
+        )
+        self.client = AsyncOpenAI(
             base_url="https://openrouter.ai/api/v1",
             api_key=self.api_key,
+            http_client=self.http_client,
+            timeout=timeout,
         )
-        # Используем Qwen3 Coder
-        self.model = "qwen/qwen3-coder"
+        # Основная модель (по умолчанию Qwen3 Coder) и резервная
+        self.model = OPENROUTER_MODEL
+        self.fallback_model = OPENROUTER_FALLBACK_MODEL or None
+        # Circuit breaker по (модель, режим): задержки обычных запросов
+        # и времени до первого фрагмента потока учитываются раздельно
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+        # Подсказки "Как начать?" в памяти (объединяет одновременные запросы)
+        self._start_hints = TTLCache(maxsize=1024, ttl=3600)
+        # Подсказки к коду по (задача, хэш нормализованного кода, хэш эталона)
+        self._analyses = TTLCache(maxsize=ANALYSIS_CACHE_SIZE, ttl=ANALYSIS_CACHE_TTL)
+        # Шаблонные подсказки по структуре кода (без обращения к модели)
+        self._structural = StructuralHints()
+        # Общая очередь запросов к модели
+        self.scheduler = get_llm_scheduler()
+
+    async def close(self) -> None:
+        """Закрыть HTTP-соединения клиента"""
+        await self.client.close()
+
+    async def _complete(self, prompt: str, max_tokens: int, stats: Optional[dict] = None,
+                        user_id: int = 0, kind: str = 'start', task_id: Optional[int] = None) -> str:
+        """
+        Выполнить запрос к модели
+
+        Запрос ждёт своей очереди в планировщике. Отмена корутины
+        (asyncio.CancelledError) прерывает HTTP-запрос. Каждый запрос
+        записывается в llm_calls.
+
+        Args:
+            prompt: Текст запроса пользователя
+            max_tokens: Ограничение длины ответа
+            stats: Словарь, в который добавляются model, prompt_tokens,
+                   completion_tokens и call_id (ID записи в llm_calls)
+            user_id: ID пользователя Telegram (для очереди планировщика)
+            kind: Тип запроса ('analyze', 'start', 'warmup')
+            task_id: ID задачи (для учёта)
+
+        Returns:
+            Ответ модели (может быть пустой строкой)
+
+        Raises:
+            CircuitOpenError: Все модели временно недоступны
+        """
+        call = {'hint_type': kind, 'task_id': task_id, 'outcome': 'error'}
+        try:
+            self._check_available('complete')
+            params = {
+                'max_tokens': max_tokens,
+                'messages': self._build_messages(prompt),
+                'temperature': 0.7,
+            }
+
+            async with self.scheduler.slot(user_id, kind):
+                started_at = time.monotonic()
+                model, response = await self._hedged(
+                    'complete',
+                    lambda model: self.client.chat.completions.create(model=model, **params)
+                )
+                call['latency_ms'] = int((time.monotonic() - started_at) * 1000)
+
+            call['model'] = model
+            if response.usage:
+                call['prompt_tokens'] = response.usage.prompt_tokens
+                call['completion_tokens'] = response.usage.completion_tokens
+
+            message = response.choices[0].message
+
+            # Получаем ответ (сначала content, потом reasoning если есть)
+            hint = message.content or getattr(message, 'reasoning', None) or ""
+            hint = hint.strip()
+            call['outcome'] = 'ok' if hint else 'empty'
+            return hint
+        except CircuitOpenError:
+            call['outcome'] = 'circuit_open'
+            raise
+        except asyncio.CancelledError:
+            call['outcome'] = 'cancelled'
+            raise
+        finally:
+            await self._record_call(call, stats)
+
+    async def _complete_stream(self, prompt: str, max_tokens: int, stats: Optional[dict] = None,
+                               user_id: int = 0, kind: str = 'analyze',
+                               task_id: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Выполнить потоковый запрос к модели
+
+        Отдаёт фрагменты ответа по мере генерации. Если модель вернула только
+        reasoning без content, он отдаётся одним фрагментом в конце.
+        Поток модели читается отдельной задачей в очередь: место в
+        планировщике освобождается, как только модель закончила ответ, а
+        задержка не включает время, пока потребитель обрабатывает фрагменты
+        (например, редактирует сообщение). Каждый запрос записывается в
+        llm_calls.
+
+        Args:
+            prompt: Текст запроса пользователя
+            max_tokens: Ограничение длины ответа
+            stats: Словарь, в который добавляются model, prompt_tokens,
+                   completion_tokens и call_id (ID записи в llm_calls)
+            user_id: ID пользователя Telegram (для очереди планировщика)
+            kind: Тип запроса
+            task_id: ID задачи (для учёта)
+
+        Yields:
+            Фрагменты ответа модели
+
+        Raises:
+            CircuitOpenError: Все модели временно недоступны
+        """
+        call = {'hint_type': kind, 'task_id': task_id, 'outcome': 'error'}
+        has_content = False
+        reasoning = []
+        # Фрагменты content, затем _STREAM_END или исключение
+        chunks: asyncio.Queue = asyncio.Queue()
+
+        async def read_upstream() -> None:
+            """Прочитать поток модели, не дожидаясь потребителя"""
+            try:
+                async with self.scheduler.slot(user_id, kind):
+                    started_at = time.monotonic()
+                    call['model'], (stream, iterator, chunk) = await self._hedged(
+                        'stream',
+                        lambda model: self._start_stream(model, params),
+                        discard=lambda started: started[0].response.aclose()
+                    )
+                    call['ttft_ms'] = int((time.monotonic() - started_at) * 1000)
+
+                    try:
+                        while chunk is not None:
+                            if chunk.usage:
+                                call['prompt_tokens'] = chunk.usage.prompt_tokens
+                                call['completion_tokens'] = chunk.usage.completion_tokens
+                            if chunk.choices:
+                                delta = chunk.choices[0].delta
+                                if delta.content:
+                                    chunks.put_nowait(delta.content)
+                                elif getattr(delta, 'reasoning', None):
+                                    reasoning.append(delta.reasoning)
+                            chunk = await anext(iterator, None)
+                    finally:
+                        # Закрываем соединение и при отмене, и при ошибке
+                        await stream.response.aclose()
+                    call['latency_ms'] = int((time.monotonic() - started_at) * 1000)
+            except Exception as e:
+                chunks.put_nowait(e)
+            else:
+                chunks.put_nowait(_STREAM_END)
+
+        reader = None
+        try:
+            self._check_available('stream')
+            params = {
+                'max_tokens': max_tokens,
+                'messages': self._build_messages(prompt),
+                'temperature': 0.7,
+                'stream_options': {'include_usage': True},
+            }
+
+            reader = asyncio.create_task(read_upstream())
+            while True:
+                item = await chunks.get()
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                has_content = True
+                yield item
+
+            if not has_content and reasoning:
+                has_content = True
+                yield "".join(reasoning).strip()
+            call['outcome'] = 'ok' if has_content else 'empty'
+        except CircuitOpenError:
+            call['outcome'] = 'circuit_open'
+            raise
+        except asyncio.CancelledError:
+            call['outcome'] = 'cancelled'
+            raise
+        finally:
+            # Потребитель отменён или вышел досрочно - останавливаем чтение
+            if reader is not None and not reader.done():
+                reader.cancel()
+                call['outcome'] = 'cancelled'
+                await asyncio.gather(reader, return_exceptions=True)
+            await self._record_call(call, stats)
+
+    @staticmethod
+    async def _record_call(call: dict, stats: Optional[dict]) -> None:
+        """Записать запрос к модели в llm_calls и дополнить stats"""
+        try:
+            record = await LLMCallCRUD.add_call(**call)
+        except Exception as e:
+            print(f"DB Error saving LLM call: {e}")
+            record = None
+
+        if stats is not None:
+            stats['model'] = call.get('model')
+            stats['prompt_tokens'] = stats.get('prompt_tokens', 0) + (call.get('prompt_tokens') or 0)
+            stats['completion_tokens'] = stats.get('completion_tokens', 0) + (call.get('completion_tokens') or 0)
+            if record is not None:
+                stats['call_id'] = record.id
+
+    async def _start_stream(self, model: str, params: dict) -> tuple:
+        """
+        Открыть поток ответа модели и дождаться первого фрагмента
+
+        Returns:
+            Кортеж (поток, итератор потока, первый фрагмент или None)
+        """
+        stream = await self.client.chat.completions.create(model=model, stream=True, **params)
+        iterator = stream.__aiter__()
+        try:
+            first = await anext(iterator, None)
+        except BaseException:
+            await stream.response.aclose()
+            raise
+        return stream, iterator, first
+
+    def _breaker(self, model: str, mode: str) -> CircuitBreaker:
+        """Circuit breaker для модели в режиме 'complete' или 'stream'"""
+        key = (model, mode)
+        if key not in self._breakers:
+            self._breakers[key] = CircuitBreaker(f"{model} ({mode})")
+        return self._breakers[key]
+
+    def _models(self) -> List[str]:
+        """Модели в порядке предпочтения"""
+        return [model for model in (self.model, self.fallback_model) if model]
+
+    def _check_available(self, mode: str) -> None:
+        """Сразу отклонить запрос, если все модели недоступны (не занимая очередь)"""
+        if all(self._breaker(model, mode).is_open() for model in self._models()):
+            raise CircuitOpenError("Все модели временно недоступны")
+
+    async def _guarded(self, model: str, mode: str, call: Callable[[str], Awaitable[Any]],
+                       slow_after: Optional[float] = None) -> Any:
+        """
+        Выполнить вызов модели, учитывая результат и задержку в circuit breaker
+
+        Вызов, отменённый позже slow_after секунд (основная модель проиграла
+        хеджированный запрос), учитывается как медленный.
+        """
+        breaker = self._breaker(model, mode)
+        started_at = time.monotonic()
+        try:
+            result = await call(model)
+        except asyncio.CancelledError:
+            breaker.record_cancel(time.monotonic() - started_at, slow_after)
+            raise
+        except Exception:
+            breaker.record_failure(time.monotonic() - started_at)
+            raise
+        breaker.record_success(time.monotonic() - started_at)
+        return result
+
+    async def _hedged(self, mode: str, call: Callable[[str], Awaitable[Any]],
+                      discard: Optional[Callable[[Any], Awaitable[Any]]] = None) -> Tuple[str, Any]:
+        """
+        Выполнить вызов с дублированием на резервную модель
+
+        Вызов отправляется первой доступной модели. Если он не завершился за
+        p95 её обычной задержки, параллельно отправляется такой же вызов
+        резервной модели; используется первый успешный ответ, второй
+        отменяется.
+
+        Args:
+            mode: Режим для circuit breaker ('complete' или 'stream')
+            call: Корутина-фабрика, принимающая название модели
+            discard: Освобождение лишнего результата, если оба вызова успели
+
+        Returns:
+            Кортеж (модель, результат)
 
-    def analyze_code(self, task_id: int, task_description: str, user_code: str) -> str:
+        Raises:
+            CircuitOpenError: Все модели временно недоступны
+        """
+        models = self._models()
+        primary = next((model for model in models if self._breaker(model, mode).allow_request()), None)
+        if primary is None:
+            raise CircuitOpenError("Все модели временно недоступны")
+        secondary = next((model for model in models if model != primary), None)
+
+        hedge_delay = None
+        if secondary:
+            hedge_delay = self._breaker(primary, mode).latency_percentile(
+                HEDGE_PERCENTILE, min_samples=HEDGE_MIN_SAMPLES
+            )
+
+        tasks = {asyncio.create_task(self._guarded(primary, mode, call, slow_after=hedge_delay)): primary}
+
+        def launch_secondary() -> Optional[asyncio.Task]:
+            if secondary in tasks.values() or not secondary:
+                return None
+            if not self._breaker(secondary, mode).allow_request():
+                return None
+            task = asyncio.create_task(self._guarded(secondary, mode, call))
+            tasks[task] = secondary
+            return task
+
+        winner = None
+        try:
+            if hedge_delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done:
+                    launch_secondary()
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                succeeded = [task for task in done if task.exception() is None]
+                if succeeded:
+                    winner = succeeded[0]
+                    return tasks[winner], winner.result()
+
+                error = next(iter(done)).exception()
+                # Основная модель ответила ошибкой - пробуем резервную
+                if not pending:
+                    fallback = launch_secondary()
+                    if fallback:
+                        pending = {fallback}
+            raise error
+        finally:
+            for task in tasks:
+                if task is winner:
+                    continue
+                if not task.done():
+                    task.cancel()
+                elif discard and not task.cancelled() and task.exception() is None:
+                    await discard(task.result())
+
+    def breaker_stats(self) -> List[dict]:
+        """
+        Получить статистику circuit breaker'ов моделей
+
+        Returns:
+            Список словарей со статистикой
+        """
+        return [breaker.stats() for breaker in self._breakers.values()]
+
+    @staticmethod
+    def _build_messages(prompt: str) -> List[dict]:
+        """Сообщения чата для запроса к модели"""
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+
+    async def analyze_code(self, task_id: int, task_description: str, user_code: str,
+                           user_id: int = 0, stats: Optional[dict] = None) -> str:
         """
         Анализировать код пользователя и дать подсказку
 
@@ -37,83 +433,268 @@ class OpenRouterClient:
             task_id: ID задачи
             task_description: Описание задачи
             user_code: Код пользователя
+            user_id: ID пользователя Telegram
+            stats: Словарь для учёта запроса (call_id, модель, токены)
 
         Returns:
             Подсказка в одном предложении
         """
+        chunks = [
+            chunk async for chunk in self.analyze_code_stream(
+                task_id, task_description, user_code, user_id, stats
+            )
+        ]
+        return "".join(chunks).strip()
+
+    async def analyze_code_stream(self, task_id: int, task_description: str,
+                                  user_code: str, user_id: int = 0,
+                                  stats: Optional[dict] = None,
+                                  tests_failed: bool = False) -> AsyncIterator[str]:
+        """
+        Анализировать код пользователя, отдавая подсказку по мере генерации
+
+        Args:
+            task_id: ID задачи
+            task_description: Описание задачи
+            user_code: Код пользователя
+            user_id: ID пользователя Telegram
+            stats: Словарь для учёта запроса (call_id, модель, токены; rule -
+                   если подсказка выдана по шаблону без модели)
+            tests_failed: Код не прошёл тесты в песочнице (False - проверки
+                          не было, шаблоны формы решения не применяются)
+
+        Yields:
+            Фрагменты подсказки
+        """
         # Получаем эталонное решение из БД
-        solutions = SolutionCRUD.get_solutions_by_task_id(task_id)
+        solutions = await SolutionCRUD.get_solutions_by_task_id(task_id)
 
         if not solutions:
-            return "К сожалению, для этой задачи пока нет эталонных решений для анализа."
+            yield "К сожалению, для этой задачи пока нет эталонных решений для анализа."
+            return
+
+        # Типичные структурные ошибки объясняем по шаблону, без модели
+        structural = self._structural.check(
+            user_code, [s.solution for s in solutions], tests_failed=tests_failed
+        )
+        if structural:
+            rule, hint = structural
+            if stats is not None:
+                stats['rule'] = rule
+            yield hint
+            return
 
         # Берем первое решение как эталонное
         correct_code = solutions[0].solution
 
-        # Создаем промпт
-        prompt = (
-            "Role: You are a helpful senior software engineer mentoring a junior student.\n\n"
-            f"Task: The student is trying to solve the following problem: {task_description}\n\n"
-            f"Reference Solution (Do not reveal): {correct_code}\n\n"
-            f"Student's Code: {user_code}\n\n"
-            "Instructions:\n"
-            "- Analyze the student's code compared to the reference.\n"
-            "- Identify the logic error or syntax error.\n"
-            "- Provide a helpful hint in ONE sentence.\n"
-            "- CRITICAL: Do NOT write the corrected code. Do NOT give the answer directly. Encourage them to think.\n"
-            "- Reply in Russian.\n"
-            "- Your response must be ONLY ONE sentence with a hint."
+        # Эквивалентный код (с точностью до пробелов, комментариев и имён
+        # переменных) уже разбирали - отдаём сохранённую подсказку
+        cache_key = (
+            task_id,
+            normalized_code_hash(user_code),
+            hashlib.sha256(correct_code.encode('utf-8')).hexdigest()
         )
+        cached = self._analyses.get(cache_key)
+        if cached:
+            yield cached
+            return
+
+        prompt = self._build_analyze_prompt(task_description, correct_code, user_code)
 
+        received = []
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                max_tokens=150,
-                messages=[
-                    {"role": "system", "content": "You are a helpful programming tutor. Always reply in Russian."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
+            async for chunk in self._complete_stream(prompt, max_tokens=150, stats=stats,
+                                                     user_id=user_id, task_id=task_id):
+                received.append(chunk)
+                yield chunk
+        except CircuitOpenError:
+            if not received:
+                yield DEGRADED_HINT
+            return
+        except Exception as e:
+            print(f"OpenRouter API Error: {e}")
+            import traceback
+            traceback.print_exc()
+            if not received:
+                yield "Произошла ошибка при анализе кода. Попробуйте позже."
+            return
+
+        hint = "".join(received).strip()
+
+        if not hint:
+            yield "Не удалось получить ответ от модели. Попробуйте позже."
+            return
+
+        self._analyses.set(cache_key, hint)
+
+    @staticmethod
+    def _build_analyze_prompt(task_description: str, correct_code: str, user_code: str) -> str:
+        """Промпт для анализа кода студента (части обрезаются под бюджет токенов)"""
+        def render(task: str, reference: str, code: str) -> str:
+            return (
+                "Role: You are a helpful senior software engineer mentoring a junior student.\n\n"
+                f"Task: The student is trying to solve the following problem: {task}\n\n"
+                f"Reference Solution (Do not reveal): {reference}\n\n"
+                f"Student's Code: {code}\n\n"
+                "Instructions:\n"
+                "- Analyze the student's code compared to the reference.\n"
+                "- Identify the logic error or syntax error.\n"
+                "- Provide a helpful hint in ONE sentence.\n"
+                "- CRITICAL: Do NOT write the corrected code. Do NOT give the answer directly. Encourage them to think.\n"
+                "- Reply in Russian.\n"
+                "- Your response must be ONLY ONE sentence with a hint."
             )
 
-            message = response.choices[0].message
+        parts = fit_parts(
+            {'task': task_description, 'reference': correct_code, 'code': user_code},
+            _parts_budget(render('', '', ''))
+        )
+        return render(parts['task'], parts['reference'], parts['code'])
 
-            # Получаем ответ (сначала content, потом reasoning если есть)
-            hint = message.content or getattr(message, 'reasoning', None) or ""
-            hint = hint.strip()
+    def analysis_cache_stats(self) -> dict:
+        """
+        Получить статистику кэша подсказок к коду
+
+        Returns:
+            Словарь со статистикой (размер, попадания, промахи)
+        """
+        return self._analyses.stats()
+
+    def structural_hint_stats(self) -> dict:
+        """
+        Получить статистику шаблонных подсказок
 
-            print(f"[DEBUG] Response: {hint[:200]}...")  # Первые 200 символов
+        Returns:
+            Словарь {checks, hits, hit_rate, rules}
+        """
+        return self._structural.stats()
+
+    async def generate_start_hint(self, task_id: int, task_description: str,
+                                  user_id: int = 0, stats: Optional[dict] = None) -> str:
+        """
+        Генерировать подсказку как начать задачу
+
+        Подсказка сохраняется по ключу (задача, хэш эталонного решения,
+        версия промпта), поэтому для каждой задачи модель вызывается один раз.
+
+        Args:
+            task_id: ID задачи
+            task_description: Описание задачи
+            user_id: ID пользователя Telegram
+            stats: Словарь для учёта запроса (call_id, модель, токены)
+
+        Returns:
+            Подсказка как начать - описание первой строки решения
+        """
+        solutions = await SolutionCRUD.get_solutions_by_task_id(task_id)
+
+        if not solutions:
+            return "К сожалению, для этой задачи пока нет подсказок."
+
+        # Берем первое решение как эталонное
+        reference_solution = solutions[0].solution
+        solution_hash = hashlib.sha256(reference_solution.encode('utf-8')).hexdigest()
+
+        try:
+            hint = await self._start_hints.get_or_load(
+                (task_id, solution_hash, START_HINT_PROMPT_VERSION),
+                lambda: self._load_start_hint(task_id, task_description, reference_solution,
+                                              solution_hash, stats=stats, user_id=user_id)
+            )
 
             if not hint:
                 return "Не удалось получить ответ от модели. Попробуйте позже."
 
             return hint
 
+        except CircuitOpenError:
+            return DEGRADED_HINT
         except Exception as e:
             print(f"OpenRouter API Error: {e}")
             import traceback
             traceback.print_exc()
-            return "Произошла ошибка при анализе кода. Попробуйте позже."
+            return "Произошла ошибка при генерации подсказки. Попробуйте позже."
 
-    def generate_start_hint(self, task_id: int, task_description: str) -> str:
+    async def warm_start_hint(self, task_id: int, task_description: str) -> dict:
         """
-        Генерировать подсказку как начать задачу
+        Заранее сгенерировать и сохранить подсказку "Как начать?"
 
         Args:
             task_id: ID задачи
             task_description: Описание задачи
 
         Returns:
-            Подсказка как начать - описание первой строки решения
+            Словарь с результатом: status ('generated', 'cached', 'no_solutions'
+            или 'failed'), prompt_tokens, completion_tokens
         """
-        solutions = SolutionCRUD.get_solutions_by_task_id(task_id)
+        result = {'status': 'failed', 'prompt_tokens': 0, 'completion_tokens': 0}
 
+        solutions = await SolutionCRUD.get_solutions_by_task_id(task_id)
         if not solutions:
-            return "К сожалению, для этой задачи пока нет подсказок."
+            result['status'] = 'no_solutions'
+            return result
 
-        # Берем первое решение как эталонное
         reference_solution = solutions[0].solution
+        solution_hash = hashlib.sha256(reference_solution.encode('utf-8')).hexdigest()
+
+        if await StartHintCacheCRUD.get_hint(task_id, solution_hash, START_HINT_PROMPT_VERSION):
+            result['status'] = 'cached'
+            return result
 
+        try:
+            hint = await self._start_hints.get_or_load(
+                (task_id, solution_hash, START_HINT_PROMPT_VERSION),
+                lambda: self._load_start_hint(task_id, task_description, reference_solution,
+                                              solution_hash, stats=result, kind='warmup')
+            )
+        except Exception as e:
+            print(f"OpenRouter API Error: {e}")
+            return result
+
+        if hint:
+            result['status'] = 'generated'
+        return result
+
+    async def _load_start_hint(self, task_id: int, task_description: str,
+                               reference_solution: str, solution_hash: str,
+                               stats: Optional[dict] = None, user_id: int = 0,
+                               kind: str = 'start') -> Optional[str]:
+        """
+        Получить подсказку из БД или сгенерировать и сохранить её
+
+        Args:
+            task_id: ID задачи
+            task_description: Описание задачи
+            reference_solution: Эталонное решение
+            solution_hash: Хэш эталонного решения
+            stats: Словарь для учёта запроса (call_id, модель, токены)
+            user_id: ID пользователя Telegram
+            kind: Тип запроса для планировщика
+
+        Returns:
+            Подсказка или None, если модель не ответила
+        """
+        cached = await StartHintCacheCRUD.get_hint(task_id, solution_hash, START_HINT_PROMPT_VERSION)
+        if cached:
+            return cached
+
+        hint = await self._complete(
+            self._build_start_prompt(task_description, reference_solution),
+            max_tokens=300,
+            stats=stats,
+            user_id=user_id,
+            kind=kind,
+            task_id=task_id
+        )
+        if not hint:
+            return None
+
+        await StartHintCacheCRUD.save_hint(task_id, solution_hash, START_HINT_PROMPT_VERSION, hint)
+        return hint
+
+    @staticmethod
+    def _build_start_prompt(task_description: str, reference_solution: str) -> str:
+        """Промпт для подсказки "Как начать?" по первой строке эталонного решения"""
         # Извлекаем первую строку кода (пропускаем комментарии и пустые строки)
         first_line = ""
         for line in reference_solution.split('\n'):
@@ -122,47 +703,26 @@ class OpenRouterClient:
                 first_line = line
                 break
 
-        prompt = (
-            "Role: You are a helpful programming tutor.\n\n"
-            f"Task: {task_description}\n\n"
-            f"First line of the reference solution: {first_line}\n\n"
-            "Instructions:\n"
-            "- Explain in ONE sentence what the first line does\n"
-            "- DO NOT write the code itself\n"
-            "- Be clear and concise\n"
-            "- Reply in Russian\n"
-            "- Your response must be ONLY ONE sentence"
-        )
-
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                max_tokens=300,
-                messages=[
-                    {"role": "system", "content": "You are a helpful programming tutor. Always reply in Russian."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
+        def render(task: str, line: str) -> str:
+            return (
+                "Role: You are a helpful programming tutor.\n\n"
+                f"Task: {task}\n\n"
+                f"First line of the reference solution: {line}\n\n"
+                "Instructions:\n"
+                "- Explain in ONE sentence what the first line does\n"
+                "- DO NOT write the code itself\n"
+                "- Be clear and concise\n"
+                "- Reply in Russian\n"
+                "- Your response must be ONLY ONE sentence"
             )
 
-            message = response.choices[0].message
-
-            # Получаем ответ (сначала content, потом reasoning если есть)
-            hint = message.content or getattr(message, 'reasoning', None) or ""
-            hint = hint.strip()
-
-            print(f"[DEBUG] Response: {hint[:200]}...")  # Первые 200 символов
-
-            if not hint:
-                return "Не удалось получить ответ от модели. Попробуйте позже."
+        parts = fit_parts({'task': task_description, 'line': first_line}, _parts_budget(render('', '')))
+        return render(parts['task'], parts['line'])
 
-            return hint
 
-        except Exception as e:
-            print(f"OpenRouter API Error: {e}")
-            import traceback
-            traceback.print_exc()
-            return "Произошла ошибка при генерации подсказки. Попробуйте позже."
+def _parts_budget(template: str) -> int:
+    """Бюджет токенов на переменные части промпта с учётом шаблона и system-сообщения"""
+    return LLM_PROMPT_TOKEN_BUDGET - estimate_tokens(template) - estimate_tokens(SYSTEM_PROMPT)
 
 
 # Глобальный экземпляр клиента
@@ -175,3 +735,11 @@ def get_openrouter_client() -> OpenRouterClient:
     if _client is None:
         _client = OpenRouterClient()
     return _client
+
+
+async def close_openrouter_client() -> None:
+    """Закрыть глобальный экземпляр клиента OpenRouter"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -0,0 +1,71 @@
+"""
+Локальная проверка кода студента перед обращением к LLM
+
+Код, который не компилируется, не нужно отправлять модели: ошибку
+синтаксиса можно объяснить сразу по шаблону с номером строки.
+"""
+
+from typing import Optional
+
+
+def check_syntax(code: str) -> Optional[str]:
+    """
+    Проверить, что код компилируется
+
+    Args:
+        code: Код студента
+
+    Returns:
+        Подсказка об ошибке синтаксиса (обычный текст, без HTML)
+        или None, если код компилируется
+    """
+    try:
+        compile(code, '<solution>', 'exec')
+    except SyntaxError as e:
+        return _format_syntax_error(e)
+    except ValueError:
+        # Например, нулевой байт в исходнике
+        return "Код содержит недопустимые символы. Скопируйте его заново из редактора."
+    return None
+
+
+def _format_syntax_error(error: SyntaxError) -> str:
+    """Шаблонная подсказка по SyntaxError/IndentationError"""
+    message = (error.msg or '').lower()
+    where = f"В строке {error.lineno}" if error.lineno else "В коде"
+
+    if isinstance(error, TabError):
+        hint = f"{where} отступы смешивают табуляцию и пробелы. Используйте только пробелы (по 4 на уровень)."
+    elif isinstance(error, IndentationError):
+        if 'expected an indented block' in message:
+            hint = f"{where} ожидается отступ: после строки с двоеточием тело блока нужно сдвинуть вправо."
+        elif 'unexpected indent' in message:
+            hint = f"{where} лишний отступ: строка сдвинута правее, чем соседние строки того же блока."
+        elif 'unindent does not match' in message:
+            hint = f"{where} отступ не совпадает ни с одним внешним уровнем. Проверьте, что строки блока выровнены одинаково."
+        else:
+            hint = f"{where} ошибка отступов. Проверьте, что строки одного блока выровнены одинаково."
+    elif "missing parentheses in call to 'print'" in message:
+        hint = f"{where} print вызван без скобок. В Python 3 print - функция: нужны круглые скобки."
+    elif "expected ':'" in message:
+        hint = f"{where} не хватает двоеточия в конце заголовка блока (if, for, while, def...)."
+    elif 'was never closed' in message or 'unexpected eof' in message:
+        hint = f"{where} открыта скобка, которая нигде не закрыта."
+    elif 'unmatched' in message or 'does not match opening parenthesis' in message:
+        hint = f"{where} лишняя или не та закрывающая скобка."
+    elif 'unterminated string' in message or 'eol while scanning' in message:
+        hint = f"{where} строка не закрыта кавычкой."
+    elif 'cannot assign' in message or "maybe you meant '=='" in message:
+        hint = f"{where} присваивание там, где ожидается выражение. Для сравнения используется '=='."
+    elif 'perhaps you forgot a comma' in message:
+        hint = f"{where}, похоже, пропущена запятая между элементами."
+    elif "'return' outside function" in message:
+        hint = f"{where} return стоит вне функции."
+    elif "outside loop" in message:
+        hint = f"{where} break или continue стоит вне цикла."
+    else:
+        hint = f"{where} синтаксическая ошибка: {error.msg}."
+
+    if error.text and error.text.strip():
+        hint += f"\nСтрока: {error.text.strip()}"
+    return hint
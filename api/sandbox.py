@@ -0,0 +1,383 @@
+"""
+Песочница для запуска кода студентов и эталонных решений на тестах
+
+Каждый запуск - отдельный процесс интерпретатора внутри bubblewrap:
+свои пространства имён (сеть, PID, пользователь, IPC), непривилегированный
+uid, файловая система только для чтения без данных бота (видны лишь
+системные библиотеки, интерпретатор и рабочий каталог запуска), пустое
+окружение. Ограничения по процессорному времени, памяти и размеру файлов
+выставляет сам запущенный интерпретатор до выполнения кода. Если bwrap
+недоступен, код не запускается. Одновременно работает не больше
+SANDBOX_WORKERS процессов, остальные запуски ждут своей очереди.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import hashlib
+import html
+import math
+import shutil
+import signal
+import tempfile
+import time
+from typing import Callable, List, Optional, Tuple
+from api.cache import TTLCache
+from client_bot.config import (
+    SANDBOX_BWRAP,
+    SANDBOX_WORKERS,
+    SANDBOX_TIME_LIMIT,
+    SANDBOX_MEMORY_LIMIT_MB,
+    SANDBOX_OUTPUT_LIMIT,
+    SANDBOX_MAX_TESTS
+)
+
+
+class SandboxUnavailableError(Exception):
+    """Изолированный запуск невозможен (bwrap не установлен или не работает)"""
+    pass
+
+
+# Выставляет ограничения ресурсов и запускает решение.
+# Аргументы: секунды процессора, байты памяти, байты файлов
+_BOOTSTRAP = (
+    "import resource, sys\n"
+    "_cpu, _memory, _fsize = map(int, sys.argv[1:4])\n"
+    "resource.setrlimit(resource.RLIMIT_CPU, (_cpu, _cpu))\n"
+    "resource.setrlimit(resource.RLIMIT_AS, (_memory, _memory))\n"
+    "resource.setrlimit(resource.RLIMIT_FSIZE, (_fsize, _fsize))\n"
+    "resource.setrlimit(resource.RLIMIT_CORE, (0, 0))\n"
+    "sys.argv = ['solution.py']\n"
+    "with open('solution.py', encoding='utf-8') as _f:\n"
+    "    _source = _f.read()\n"
+    "exec(compile(_source, 'solution.py', 'exec'), {'__name__': '__main__'})\n"
+)
+
+# Максимальный размер файлов, которые может создать решение
+_FILE_SIZE_LIMIT = 1024 * 1024
+
+# Непривилегированный пользователь внутри песочницы (nobody)
+_SANDBOX_UID = 65534
+
+# Рабочий каталог запуска внутри песочницы
+_SANDBOX_DIR = '/sandbox'
+
+# Коды завершения при превышении RLIMIT_CPU (SIGXCPU, затем SIGKILL): bwrap
+# возвращает 128 + номер сигнала, процесс без bwrap - отрицательный номер
+_CPU_LIMIT_EXIT_CODES = {
+    code for sig in (signal.SIGKILL, signal.SIGXCPU) for code in (128 + sig, -sig)
+}
+
+# Ограничение одновременных запусков (создаётся в работающем event loop)
+_slots: Optional[asyncio.Semaphore] = None
+
+# Результат проверки bwrap (None - ещё не проверяли)
+_isolation_available: Optional[bool] = None
+
+# Вывод эталонных решений: (хэш решения, хэш входных данных) -> вывод
+_reference_outputs = TTLCache(maxsize=2048, ttl=24 * 3600)
+
+
+def _isolated_command(workdir: str) -> List[str]:
+    """Команда запуска интерпретатора в bubblewrap с рабочим каталогом workdir"""
+    command = [
+        SANDBOX_BWRAP,
+        '--unshare-all', '--unshare-user',
+        '--uid', str(_SANDBOX_UID), '--gid', str(_SANDBOX_UID),
+        '--die-with-parent', '--new-session', '--cap-drop', 'ALL',
+        '--ro-bind', '/usr', '/usr',
+        '--ro-bind-try', '/lib', '/lib',
+        '--ro-bind-try', '/lib64', '/lib64',
+        '--ro-bind-try', '/bin', '/bin',
+        '--ro-bind-try', '/etc/ld.so.cache', '/etc/ld.so.cache',
+    ]
+    # Интерпретатор, установленный вне /usr (pyenv, conda)
+    for prefix in sorted({sys.base_prefix, sys.prefix}):
+        if not prefix.startswith('/usr/'):
+            command += ['--ro-bind', prefix, prefix]
+    cpu_seconds = math.ceil(SANDBOX_TIME_LIMIT) + 1
+    command += [
+        '--proc', '/proc', '--dev', '/dev', '--tmpfs', '/tmp',
+        '--bind', workdir, _SANDBOX_DIR, '--chdir', _SANDBOX_DIR,
+        '--clearenv', '--setenv', 'PYTHONIOENCODING', 'utf-8',
+        '--',
+        sys.executable, '-I', '-S', '-c', _BOOTSTRAP,
+        str(cpu_seconds), str(SANDBOX_MEMORY_LIMIT_MB * 1024 * 1024), str(_FILE_SIZE_LIMIT)
+    ]
+    return command
+
+
+async def sandbox_available() -> bool:
+    """
+    Проверить (один раз), что bwrap запускает интерпретатор в изоляции
+
+    Returns:
+        True если решения можно запускать
+    """
+    global _isolation_available
+    if _isolation_available is None:
+        _isolation_available = False
+        if shutil.which(SANDBOX_BWRAP):
+            result = await _run("", "", SANDBOX_TIME_LIMIT)
+            _isolation_available = result['status'] == 'ok'
+            if not _isolation_available:
+                print(f"Sandbox unavailable: {result['stderr'].strip()[:200]}")
+        else:
+            print(f"Sandbox unavailable: {SANDBOX_BWRAP} not found")
+    return _isolation_available
+
+
+def _get_slots() -> asyncio.Semaphore:
+    """Получить семафор одновременных запусков"""
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(SANDBOX_WORKERS)
+    return _slots
+
+
+async def _read_limited(stream: asyncio.StreamReader, limit: int,
+                        on_overflow: Callable[[], None]) -> Tuple[bytes, bool]:
+    """
+    Прочитать поток до конца, сохранив не больше limit байт
+
+    При превышении лимита вызывается on_overflow, а остаток потока
+    дочитывается без сохранения.
+
+    Returns:
+        Кортеж (данные, превышен ли лимит)
+    """
+    chunks = []
+    size = 0
+    overflow = False
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            return b"".join(chunks)[:limit], overflow
+        if not overflow:
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > limit:
+                overflow = True
+                on_overflow()
+
+
+async def _drain(stream: asyncio.StreamReader) -> None:
+    """Дочитать поток завершённого процесса без сохранения"""
+    while await stream.read(65536):
+        pass
+
+
+async def _feed(stream: asyncio.StreamWriter, data: bytes) -> None:
+    """Передать входные данные процессу (процесс может не читать stdin)"""
+    try:
+        stream.write(data)
+        await stream.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        pass
+    finally:
+        stream.close()
+
+
+def _kill(process: asyncio.subprocess.Process) -> None:
+    """Завершить процесс вместе с его потомками"""
+    if process.returncode is not None:
+        return
+    try:
+        os.killpg(process.pid, 9)
+    except ProcessLookupError:
+        pass
+
+
+async def run_code(code: str, stdin: str = "", time_limit: float = SANDBOX_TIME_LIMIT) -> dict:
+    """
+    Выполнить программу в песочнице
+
+    Args:
+        code: Исходный код на Python
+        stdin: Входные данные
+        time_limit: Ограничение времени выполнения в секундах
+
+    Returns:
+        Словарь {'status', 'stdout', 'stderr', 'elapsed_ms'}, где status -
+        'ok', 'timeout', 'runtime_error' или 'output_limit'
+
+    Raises:
+        SandboxUnavailableError: Изолированный запуск невозможен
+    """
+    if not await sandbox_available():
+        raise SandboxUnavailableError(f"{SANDBOX_BWRAP} недоступен")
+    return await _run(code, stdin, time_limit)
+
+
+async def _run(code: str, stdin: str, time_limit: float) -> dict:
+    """Запустить программу в bubblewrap (без проверки доступности)"""
+    async with _get_slots():
+        with tempfile.TemporaryDirectory(prefix='sandbox_') as workdir:
+            with open(os.path.join(workdir, 'solution.py'), 'w', encoding='utf-8') as f:
+                f.write(code)
+
+            started_at = time.monotonic()
+            process = await asyncio.create_subprocess_exec(
+                *_isolated_command(workdir),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env={},
+                start_new_session=True
+            )
+
+            async def communicate() -> tuple:
+                results = await asyncio.gather(
+                    _feed(process.stdin, stdin.encode('utf-8')),
+                    _read_limited(process.stdout, SANDBOX_OUTPUT_LIMIT, lambda: _kill(process)),
+                    _read_limited(process.stderr, SANDBOX_OUTPUT_LIMIT, lambda: _kill(process))
+                )
+                await process.wait()
+                return results
+
+            status = 'ok'
+            stdout, stderr = b"", b""
+            try:
+                # Общий срок на ввод, вывод и завершение процесса
+                _, (stdout, overflow), (stderr, _) = await asyncio.wait_for(communicate(), timeout=time_limit)
+                if overflow:
+                    status = 'output_limit'
+            except asyncio.TimeoutError:
+                status = 'timeout'
+            finally:
+                _kill(process)
+                # Пока каналы не дочитаны, процесс не считается завершённым
+                await asyncio.gather(_drain(process.stdout), _drain(process.stderr))
+                await process.wait()
+
+            elapsed_ms = int((time.monotonic() - started_at) * 1000)
+
+    if status == 'ok' and process.returncode != 0:
+        status = 'timeout' if process.returncode in _CPU_LIMIT_EXIT_CODES else 'runtime_error'
+
+    return {
+        'status': status,
+        'stdout': stdout.decode('utf-8', errors='replace'),
+        'stderr': stderr.decode('utf-8', errors='replace'),
+        'elapsed_ms': elapsed_ms
+    }
+
+
+def _normalize_output(output: str) -> str:
+    """Вывод без пробелов в концах строк и пустых строк в конце"""
+    lines = [line.rstrip() for line in output.strip().splitlines()]
+    return "\n".join(lines)
+
+
+async def _reference_output(references: List[str], stdin: str) -> Optional[str]:
+    """
+    Получить эталонный вывод для входных данных (с кэшированием)
+
+    Используется первое эталонное решение, которое отработало без ошибок.
+    """
+    key = (
+        hashlib.sha256("\0".join(references).encode('utf-8')).hexdigest(),
+        hashlib.sha256(stdin.encode('utf-8')).hexdigest()
+    )
+
+    async def load() -> Optional[str]:
+        for reference in references:
+            result = await run_code(reference, stdin)
+            if result['status'] == 'ok':
+                return _normalize_output(result['stdout'])
+        return None
+
+    return await _reference_outputs.get_or_load(key, load)
+
+
+async def check_solution(code: str, references: List[str], inputs: List[str]) -> dict:
+    """
+    Проверить решение студента на тестах, сравнивая вывод с эталонным
+
+    Проверка останавливается на первом непройденном тесте.
+
+    Args:
+        code: Код студента
+        references: Эталонные решения задачи
+        inputs: Входные данные тестов (пустой список - один запуск без ввода)
+
+    Returns:
+        Словарь {'status', 'tests', 'elapsed_ms', 'input', 'expected',
+        'actual', 'error'}, где status - 'pass', 'wrong_answer', 'timeout',
+        'runtime_error' или 'unavailable' (эталон не запустился или
+        песочница недоступна)
+    """
+    inputs = (inputs or [""])[:SANDBOX_MAX_TESTS]
+    verdict = {'status': 'unavailable', 'tests': 0, 'elapsed_ms': 0}
+    if not await sandbox_available():
+        return verdict
+
+    for stdin in inputs:
+        expected, result = await asyncio.gather(
+            _reference_output(references, stdin),
+            run_code(code, stdin)
+        )
+        verdict['elapsed_ms'] += result['elapsed_ms']
+        if expected is None:
+            continue
+
+        verdict['tests'] += 1
+        verdict['input'] = stdin
+        if result['status'] in ('timeout', 'output_limit'):
+            verdict['status'] = 'timeout' if result['status'] == 'timeout' else 'wrong_answer'
+            verdict['expected'] = expected
+            verdict['actual'] = result['stdout']
+            return verdict
+        if result['status'] == 'runtime_error':
+            verdict['status'] = 'runtime_error'
+            lines = result['stderr'].strip().splitlines()
+            verdict['error'] = lines[-1] if lines else ''
+            return verdict
+
+        actual = _normalize_output(result['stdout'])
+        if actual != expected:
+            verdict['status'] = 'wrong_answer'
+            verdict['expected'] = expected
+            verdict['actual'] = actual
+            return verdict
+        verdict['status'] = 'pass'
+
+    return verdict
+
+
+def _shorten(text: str, limit: int = 200) -> str:
+    """Обрезать текст для сообщения"""
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def format_verdict(verdict: dict) -> str:
+    """
+    Текст результата проверки на тестах (HTML)
+
+    Args:
+        verdict: Результат check_solution
+
+    Returns:
+        Текст для сообщения или пустая строка, если проверка не проводилась
+    """
+    status = verdict['status']
+    if status == 'unavailable':
+        return ""
+    if status == 'pass':
+        return f"✅ <b>Все тесты пройдены</b> ({verdict['tests']}, {verdict['elapsed_ms']} мс)\n"
+
+    stdin = verdict.get('input', '')
+    on_input = (
+        f"\nВходные данные:\n<pre>{html.escape(_shorten(stdin))}</pre>" if stdin.strip() else ""
+    )
+    if status == 'timeout':
+        return f"⏱ <b>Превышено время выполнения</b>{on_input}\n"
+    if status == 'runtime_error':
+        error = html.escape(_shorten(verdict.get('error', '')))
+        return f"💥 <b>Ошибка выполнения:</b> <code>{error}</code>{on_input}\n"
+    return (
+        f"❌ <b>Неверный ответ</b>{on_input}\n"
+        f"Ваш вывод:\n<pre>{html.escape(_shorten(verdict.get('actual', '')))}</pre>\n"
+    )
@@ -0,0 +1,89 @@
+"""
+Локальная оценка количества токенов и обрезка промптов под бюджет
+"""
+
+import math
+from typing import Dict
+
+# Примерное количество символов на токен: латиница и код кодируются
+# плотнее, кириллица и прочие символы - примерно вдвое хуже
+_ASCII_CHARS_PER_TOKEN = 4
+_OTHER_CHARS_PER_TOKEN = 2
+
+TRIM_MARKER = "\n…"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Оценить количество токенов в тексте без обращения к токенизатору модели
+
+    Args:
+        text: Текст
+
+    Returns:
+        Оценка количества токенов (с запасом в большую сторону)
+    """
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    other_chars = len(text) - ascii_chars
+    return math.ceil(ascii_chars / _ASCII_CHARS_PER_TOKEN + other_chars / _OTHER_CHARS_PER_TOKEN)
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Обрезать текст так, чтобы он укладывался в max_tokens
+
+    Args:
+        text: Текст
+        max_tokens: Допустимое количество токенов
+
+    Returns:
+        Исходный текст или его начало с пометкой об обрезке
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    budget = max(0, max_tokens - estimate_tokens(TRIM_MARKER))
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low] + TRIM_MARKER
+
+
+def fit_parts(parts: Dict[str, str], budget: int) -> Dict[str, str]:
+    """
+    Обрезать части промпта, чтобы их сумма укладывалась в бюджет
+
+    Бюджет делится поровну; части, которым нужно меньше своей доли,
+    остаются целиком, а освободившийся запас достаётся более длинным.
+
+    Args:
+        parts: Название части -> текст
+        budget: Бюджет токенов на все части вместе
+
+    Returns:
+        Название части -> текст (возможно обрезанный)
+    """
+    sizes = {name: estimate_tokens(text) for name, text in parts.items()}
+    if sum(sizes.values()) <= budget:
+        return dict(parts)
+
+    limits = {}
+    remaining = max(0, budget)
+    pending = sorted(sizes, key=sizes.get)
+    while pending:
+        share = remaining // len(pending)
+        name = pending[0]
+        if sizes[name] <= share:
+            limits[name] = sizes[name]
+            remaining -= sizes[name]
+            pending.pop(0)
+        else:
+            for name in pending:
+                limits[name] = share
+            break
+
+    return {name: trim_to_tokens(text, limits[name]) for name, text in parts.items()}
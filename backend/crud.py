@@ -2,17 +2,113 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from backend.database import Solution, Hint, Homework, get_db
-from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from backend.database import (
+    Solution, Hint, HintDailyStat, Homework, KimSnapshot, StartHintCache, LLMCall, TaskTest,
+    get_async_db
+)
+from datetime import date, datetime, timedelta
+
+
+class SolutionSnapshot(NamedTuple):
+    """Неизменяемая копия эталонного решения (хранится в кэше SolutionCRUD)"""
+    id: int
+    task_id: int
+    solution: str
+    comment: Optional[str]
+    created_at: datetime
+
+    @classmethod
+    def from_row(cls, row: Solution) -> 'SolutionSnapshot':
+        """Снять копию со строки БД"""
+        return cls(row.id, row.task_id, row.solution, row.comment, row.created_at)
+
+
+# Сколько символов комментария показывать в списке решений
+SOLUTION_PREVIEW_LENGTH = 20
+
+
+class SolutionListItem(NamedTuple):
+    """Строка списка решений: без текста решения, с началом комментария"""
+    id: int
+    task_id: int
+    comment_preview: Optional[str]
+
+    @classmethod
+    def from_comment(cls, id: int, task_id: int, comment: Optional[str]) -> 'SolutionListItem':
+        """Обрезать комментарий до SOLUTION_PREVIEW_LENGTH символов"""
+        if comment and len(comment) > SOLUTION_PREVIEW_LENGTH:
+            comment = comment[:SOLUTION_PREVIEW_LENGTH] + "..."
+        return cls(id, task_id, comment)
+
+
+class SolutionsPage(NamedTuple):
+    """Страница списка решений"""
+    items: List[SolutionListItem]
+    has_prev: bool
+    has_next: bool
 
 
 class SolutionCRUD:
     """CRUD операции для эталонных решений"""
 
-    @staticmethod
-    def add_solution(task_id: int, solution: str, comment: Optional[str] = None) -> Solution:
+    # Решения по задачам (task_id -> копии решений). Решения меняет только
+    # администратор через методы этого класса, поэтому кэш сбрасывается
+    # при записи и не имеет TTL
+    _task_cache: Dict[int, Tuple[SolutionSnapshot, ...]] = {}
+
+    # Номер изменения решений задачи: загрузка, начатая до записи,
+    # не должна положить в кэш устаревшие данные
+    _task_versions: Dict[int, int] = {}
+
+    # Общее количество решений (None - не посчитано) и номер изменения
+    # любых решений - по тому же правилу, что и _task_versions
+    _total_count: Optional[int] = None
+    _total_version: int = 0
+
+    @classmethod
+    def _invalidate_task(cls, task_id: int) -> None:
+        """Сбросить кэш решений задачи (вызывается после commit)"""
+        cls._task_versions[task_id] = cls._task_versions.get(task_id, 0) + 1
+        cls._task_cache.pop(task_id, None)
+        cls._total_version += 1
+        cls._total_count = None
+
+    @classmethod
+    async def _get_task_snapshots(cls, task_id: int) -> Tuple[SolutionSnapshot, ...]:
+        """
+        Получить копии решений задачи из кэша или загрузить их из БД
+
+        Args:
+            task_id: ID задачи
+
+        Returns:
+            Кортеж копий решений в порядке добавления
+        """
+        cached = cls._task_cache.get(task_id)
+        if cached is not None:
+            return cached
+
+        version = cls._task_versions.get(task_id, 0)
+        db = get_async_db()
+        try:
+            rows = (await db.scalars(select(Solution).where(
+                Solution.task_id == task_id
+            ).order_by(Solution.id))).all()
+        finally:
+            await db.close()
+
+        snapshots = tuple(SolutionSnapshot.from_row(row) for row in rows)
+        if cls._task_versions.get(task_id, 0) == version:
+            cls._task_cache[task_id] = snapshots
+        return snapshots
+
+    @classmethod
+    async def add_solution(cls, task_id: int, solution: str, comment: Optional[str] = None) -> Solution:
         """
         Добавить эталонное решение
 
@@ -24,7 +120,7 @@ class SolutionCRUD:
         Returns:
             Созданное решение
         """
-        db = get_db()
+        db = get_async_db()
         try:
             new_solution = Solution(
                 task_id=task_id,
@@ -32,34 +128,29 @@ class SolutionCRUD:
                 comment=comment
             )
             db.add(new_solution)
-            db.commit()
-            db.refresh(new_solution)
+            await StartHintCacheCRUD.invalidate_task(db, task_id)
+            await db.commit()
+            cls._invalidate_task(task_id)
+            await db.refresh(new_solution)
             return new_solution
         finally:
-            db.close()
+            await db.close()
 
-    @staticmethod
-    def get_solutions_by_task_id(task_id: int) -> List[Solution]:
+    @classmethod
+    async def get_solutions_by_task_id(cls, task_id: int) -> List[SolutionSnapshot]:
         """
-        Получить все решения для задачи
+        Получить все решения для задачи (из кэша)
 
         Args:
             task_id: ID задачи
 
         Returns:
-            Список решений
+            Список копий решений в порядке добавления
         """
-        db = get_db()
-        try:
-            solutions = db.query(Solution).filter(
-                Solution.task_id == task_id
-            ).all()
-            return solutions
-        finally:
-            db.close()
+        return list(await cls._get_task_snapshots(task_id))
 
     @staticmethod
-    def get_solution_by_id(solution_id: int) -> Optional[Solution]:
+    async def get_solution_by_id(solution_id: int) -> Optional[Solution]:
         """
         Получить решение по ID
 
@@ -69,18 +160,18 @@ class SolutionCRUD:
         Returns:
             Решение или None
         """
-        db = get_db()
+        db = get_async_db()
         try:
-            solution = db.query(Solution).filter(
+            solution = await db.scalar(select(Solution).where(
                 Solution.id == solution_id
-            ).first()
+            ).limit(1))
             return solution
         finally:
-            db.close()
+            await db.close()
 
-    @staticmethod
-    def update_solution(solution_id: int, solution: Optional[str] = None,
-                       comment: Optional[str] = None) -> Optional[Solution]:
+    @classmethod
+    async def update_solution(cls, solution_id: int, solution: Optional[str] = None,
+                              comment: Optional[str] = None) -> Optional[Solution]:
         """
         Обновить решение
 
@@ -92,11 +183,11 @@ class SolutionCRUD:
         Returns:
             Обновленное решение или None
         """
-        db = get_db()
+        db = get_async_db()
         try:
-            db_solution = db.query(Solution).filter(
+            db_solution = await db.scalar(select(Solution).where(
                 Solution.id == solution_id
-            ).first()
+            ).limit(1))
 
             if db_solution:
                 if solution is not None:
@@ -104,15 +195,17 @@ class SolutionCRUD:
                 if comment is not None:
                     db_solution.comment = comment
 
-                db.commit()
-                db.refresh(db_solution)
+                await StartHintCacheCRUD.invalidate_task(db, db_solution.task_id)
+                await db.commit()
+                cls._invalidate_task(db_solution.task_id)
+                await db.refresh(db_solution)
                 return db_solution
             return None
         finally:
-            db.close()
+            await db.close()
 
-    @staticmethod
-    def delete_solution(solution_id: int) -> bool:
+    @classmethod
+    async def delete_solution(cls, solution_id: int) -> bool:
         """
         Удалить решение
 
@@ -122,61 +215,146 @@ class SolutionCRUD:
         Returns:
             True если удалено, False если не найдено
         """
-        db = get_db()
+        db = get_async_db()
         try:
-            db_solution = db.query(Solution).filter(
+            db_solution = await db.scalar(select(Solution).where(
                 Solution.id == solution_id
-            ).first()
+            ).limit(1))
 
             if db_solution:
-                db.delete(db_solution)
-                db.commit()
+                await db.delete(db_solution)
+                await StartHintCacheCRUD.invalidate_task(db, db_solution.task_id)
+                await db.commit()
+                cls._invalidate_task(db_solution.task_id)
                 return True
             return False
         finally:
-            db.close()
+            await db.close()
 
     @staticmethod
-    def get_all_solutions() -> List[Solution]:
+    async def get_all_solutions() -> List[Solution]:
         """
         Получить все решения
 
         Returns:
             Список всех решений
         """
-        db = get_db()
+        db = get_async_db()
         try:
-            solutions = db.query(Solution).all()
+            solutions = (await db.scalars(select(Solution))).all()
             return solutions
         finally:
-            db.close()
+            await db.close()
+
+    @classmethod
+    async def count_all_solutions(cls) -> int:
+        """
+        Подсчитать общее количество решений (значение кэшируется до записи)
+
+        Returns:
+            Количество решений
+        """
+        if cls._total_count is not None:
+            return cls._total_count
+
+        version = cls._total_version
+        db = get_async_db()
+        try:
+            count = await db.scalar(select(func.count()).select_from(Solution))
+        finally:
+            await db.close()
+
+        if cls._total_version == version:
+            cls._total_count = count
+        return count
 
     @staticmethod
-    def count_solutions_by_task(task_id: int) -> int:
+    async def get_solutions_page(after_id: Optional[int] = None, before_id: Optional[int] = None,
+                                 limit: int = 5) -> SolutionsPage:
         """
-        Подсчитать количество решений для задачи
+        Получить страницу списка решений (keyset-пагинация по ID)
+
+        Загружаются только id, task_id и начало комментария.
 
         Args:
-            task_id: ID задачи
+            after_id: Вернуть решения с ID больше этого (следующая страница)
+            before_id: Вернуть решения с ID меньше этого (предыдущая страница)
+            limit: Размер страницы
 
         Returns:
-            Количество решений
+            Страница решений в порядке возрастания ID
         """
-        db = get_db()
+        query = select(
+            Solution.id,
+            Solution.task_id,
+            func.substr(Solution.comment, 1, SOLUTION_PREVIEW_LENGTH + 1)
+        )
+        if before_id is not None:
+            query = query.where(Solution.id < before_id).order_by(Solution.id.desc())
+        else:
+            query = query.where(Solution.id > (after_id or 0)).order_by(Solution.id)
+
+        db = get_async_db()
         try:
-            count = db.query(Solution).filter(
-                Solution.task_id == task_id
-            ).count()
-            return count
+            # Одна лишняя строка показывает, есть ли страница дальше
+            rows = (await db.execute(query.limit(limit + 1))).all()
         finally:
-            db.close()
+            await db.close()
+
+        has_more = len(rows) > limit
+        items = [SolutionListItem.from_comment(*row) for row in rows[:limit]]
+
+        if before_id is not None:
+            if not items:
+                # Предыдущие решения удалены - показываем первую страницу
+                return await SolutionCRUD.get_solutions_page(limit=limit)
+            items.reverse()
+            return SolutionsPage(items, has_prev=has_more, has_next=True)
+        if after_id and not items:
+            # Следующие решения удалены - показываем последнюю страницу
+            page = await SolutionCRUD.get_solutions_page(before_id=after_id + 1, limit=limit)
+            return page._replace(has_next=False)
+        return SolutionsPage(items, has_prev=bool(after_id), has_next=has_more)
+
+    @classmethod
+    async def count_solutions_by_task(cls, task_id: int) -> int:
+        """
+        Подсчитать количество решений для задачи (из кэша)
+
+        Args:
+            task_id: ID задачи
+
+        Returns:
+            Количество решений
+        """
+        return len(await cls._get_task_snapshots(task_id))
 
 
 class HintCRUD:
     """CRUD операции для подсказок"""
 
+    # Миграция, создающая триггер trg_hints_rating_daily_stats: без него
+    # оценки не попадают в дневные сводки
+    RATING_TRIGGER_VERSION = 2
+
+    # Версия схемы проверяется один раз за процесс
+    _schema_checked: bool = False
+
+    @classmethod
+    async def _require_rating_trigger(cls, db: AsyncSession) -> None:
+        """Убедиться, что миграции применены и оценки пересчитываются в сводках"""
+        if cls._schema_checked:
+            return
+        version = await db.scalar(text('PRAGMA user_version'))
+        if version < cls.RATING_TRIGGER_VERSION:
+            raise RuntimeError(
+                f"Схема БД версии {version}, нужна {cls.RATING_TRIGGER_VERSION}: "
+                f"выполните python migrate.py"
+            )
+        cls._schema_checked = True
+
     @staticmethod
-    def add_hint(user_id: int, task_id: int, hint_text: str, hint_type: str) -> Hint:
+    async def add_hint(user_id: int, task_id: int, hint_text: str, hint_type: str) -> Hint:
         """
         Добавить подсказку
 
@@ -184,52 +362,72 @@ class HintCRUD:
             user_id: ID пользователя Telegram
             task_id: ID задачи
             hint_text: Текст подсказки
-            hint_type: Тип подсказки ('start' или 'analyze')
+            hint_type: Тип подсказки ('start', 'analyze', 'syntax' или 'heuristic')
 
         Returns:
             Созданная подсказка
         """
-        db = get_db()
+        db = get_async_db()
         try:
+            now = datetime.now()
             new_hint = Hint(
                 user_id=user_id,
                 task_id=task_id,
                 hint_text=hint_text,
-                hint_type=hint_type
+                hint_type=hint_type,
+                created_at=now
             )
             db.add(new_hint)
-            db.commit()
-            db.refresh(new_hint)
+            # Дневная сводка обновляется в той же транзакции
+            await db.execute(sqlite_insert(HintDailyStat).values(
+                day=now.date(),
+                task_id=task_id,
+                hint_type=hint_type,
+                total=1,
+                helpful=0,
+                not_helpful=0
+            ).on_conflict_do_update(
+                index_elements=['day', 'task_id', 'hint_type'],
+                set_={'total': HintDailyStat.total + 1}
+            ))
+            await db.commit()
+            await db.refresh(new_hint)
             return new_hint
         finally:
-            db.close()
+            await db.close()
 
-    @staticmethod
-    def mark_helpful(hint_id: int, was_helpful: bool) -> Optional[Hint]:
+    @classmethod
+    async def mark_helpful(cls, hint_id: int, user_id: int, was_helpful: bool) -> bool:
         """
         Отметить, была ли подсказка полезной
 
+        Один UPDATE; дневную сводку пересчитывает триггер (миграция 2).
+
         Args:
             hint_id: ID подсказки
+            user_id: ID пользователя, которому выдана подсказка
             was_helpful: True если помогла, False если нет
 
         Returns:
-            Обновленная подсказка или None
+            True если оценка сохранена, False если подсказка не найдена
+
+        Raises:
+            RuntimeError: Миграция с триггером не применена
         """
-        db = get_db()
+        db = get_async_db()
         try:
-            hint = db.query(Hint).filter(Hint.id == hint_id).first()
-            if hint:
-                hint.was_helpful = was_helpful
-                db.commit()
-                db.refresh(hint)
-                return hint
-            return None
+            await cls._require_rating_trigger(db)
+            result = await db.execute(update(Hint).where(
+                Hint.id == hint_id,
+                Hint.user_id == user_id
+            ).values(was_helpful=was_helpful))
+            await db.commit()
+            return bool(result.rowcount)
         finally:
-            db.close()
+            await db.close()
 
     @staticmethod
-    def get_user_hints(user_id: int, limit: int = 10) -> List[Hint]:
+    async def get_user_hints(user_id: int, limit: int = 10) -> List[Hint]:
         """
         Получить подсказки пользователя
 
@@ -240,76 +438,114 @@ class HintCRUD:
         Returns:
             Список подсказок
         """
-        db = get_db()
+        db = get_async_db()
         try:
-            hints = db.query(Hint).filter(
+            hints = (await db.scalars(select(Hint).where(
                 Hint.user_id == user_id
-            ).order_by(Hint.created_at.desc()).limit(limit).all()
+            ).order_by(Hint.created_at.desc()).limit(limit))).all()
             return hints
         finally:
-            db.close()
+            await db.close()
 
     @staticmethod
-    def get_task_hints(task_id: int) -> List[Hint]:
+    async def get_recent_hints(limit: int = 10) -> List[Hint]:
         """
-        Получить все подсказки для задачи
+        Получить последние подсказки всех пользователей
 
         Args:
-            task_id: ID задачи
+            limit: Максимальное количество подсказок
 
         Returns:
             Список подсказок
         """
-        db = get_db()
+        db = get_async_db()
         try:
-            hints = db.query(Hint).filter(
-                Hint.task_id == task_id
-            ).order_by(Hint.created_at.desc()).all()
+            hints = (await db.scalars(select(Hint).order_by(
+                Hint.created_at.desc()
+            ).limit(limit))).all()
             return hints
         finally:
-            db.close()
+            await db.close()
 
     @staticmethod
-    def get_hint_stats(days: int = 7) -> dict:
+    async def get_task_hints(task_id: int) -> List[Hint]:
         """
-        Получить статистику по подсказкам
+        Получить все подсказки для задачи
 
         Args:
-            days: За сколько дней показывать статистику
+            task_id: ID задачи
 
         Returns:
-            Словарь со статистикой
+            Список подсказок
         """
-        db = get_db()
+        db = get_async_db()
         try:
-            since_date = datetime.now() - timedelta(days=days)
+            hints = (await db.scalars(select(Hint).where(
+                Hint.task_id == task_id
+            ).order_by(Hint.created_at.desc()))).all()
+            return hints
+        finally:
+            await db.close()
+
+    @classmethod
+    async def get_hint_stats(cls, days: int = 7, date_from: Optional[date] = None,
+                             date_to: Optional[date] = None) -> dict:
+        """
+        Получить статистику по подсказкам из дневных сводок
 
-            total_hints = db.query(Hint).filter(
-                Hint.created_at >= since_date
-            ).count()
+        Окно задаётся либо числом последних дней, либо датами date_from/date_to
+        (включительно).
 
-            helpful_hints = db.query(Hint).filter(
-                Hint.created_at >= since_date,
-                Hint.was_helpful == True
-            ).count()
+        Args:
+            days: За сколько календарных дней (включая сегодня) показывать статистику
+            date_from: Первый день окна (вместо days)
+            date_to: Последний день окна (по умолчанию без ограничения)
 
-            not_helpful_hints = db.query(Hint).filter(
-                Hint.created_at >= since_date,
-                Hint.was_helpful == False
-            ).count()
+        Returns:
+            Словарь со статистикой: total, helpful, not_helpful, not_rated,
+            days, by_task и by_type (task_id/тип -> те же счётчики)
 
-            return {
-                'total': total_hints,
-                'helpful': helpful_hints,
-                'not_helpful': not_helpful_hints,
-                'not_rated': total_hints - helpful_hints - not_helpful_hints,
-                'days': days
-            }
+        Raises:
+            RuntimeError: Миграция с триггером не применена
+        """
+        if date_from is None:
+            date_from = (datetime.now() - timedelta(days=days - 1)).date()
+
+        query = select(
+            HintDailyStat.task_id,
+            HintDailyStat.hint_type,
+            func.sum(HintDailyStat.total),
+            func.sum(HintDailyStat.helpful),
+            func.sum(HintDailyStat.not_helpful)
+        ).where(HintDailyStat.day >= date_from)
+        if date_to is not None:
+            query = query.where(HintDailyStat.day <= date_to)
+        query = query.group_by(HintDailyStat.task_id, HintDailyStat.hint_type)
+
+        db = get_async_db()
+        try:
+            await cls._require_rating_trigger(db)
+            rows = (await db.execute(query)).all()
         finally:
-            db.close()
+            await db.close()
+
+        stats = _empty_hint_counters()
+        stats.update({'days': days, 'by_task': {}, 'by_type': {}})
+        for task_id, hint_type, total, helpful, not_helpful in rows:
+            for item in (
+                stats,
+                stats['by_task'].setdefault(task_id, _empty_hint_counters()),
+                stats['by_type'].setdefault(hint_type, _empty_hint_counters())
+            ):
+                item['total'] += total
+                item['helpful'] += helpful
+                item['not_helpful'] += not_helpful
+                item['not_rated'] += total - helpful - not_helpful
+
+        return stats
 
     @staticmethod
-    def get_latest_hint_for_user(user_id: int) -> Optional[Hint]:
+    async def get_latest_hint_for_user(user_id: int) -> Optional[Hint]:
         """
         Получить последнюю подсказку пользователя
 
@@ -319,21 +555,21 @@ class HintCRUD:
         Returns:
             Последняя подсказка или None
         """
-        db = get_db()
+        db = get_async_db()
         try:
-            hint = db.query(Hint).filter(
+            hint = await db.scalar(select(Hint).where(
                 Hint.user_id == user_id
-            ).order_by(Hint.created_at.desc()).first()
+            ).order_by(Hint.created_at.desc()).limit(1))
             return hint
         finally:
-            db.close()
+            await db.close()
 
 
 class HomeworkCRUD:
     """CRUD операции для домашних работ"""
 
     @staticmethod
-    def add_homework(kim: int, title: Optional[str] = None, is_active: bool = True) -> Homework:
+    async def add_homework(kim: int, title: Optional[str] = None, is_active: bool = True) -> Homework:
         """
         Добавить домашнюю работу
 
@@ -345,7 +581,7 @@ class HomeworkCRUD:
         Returns:
             Созданная домашняя работа
         """
-        db = get_db()
+        db = get_async_db()
         try:
             new_homework = Homework(
                 kim=kim,
@@ -353,46 +589,46 @@ class HomeworkCRUD:
                 is_active=is_active
             )
             db.add(new_homework)
-            db.commit()
-            db.refresh(new_homework)
+            await db.commit()
+            await db.refresh(new_homework)
             return new_homework
         finally:
-            db.close()
+            await db.close()
 
     @staticmethod
-    def get_all_homeworks() -> List[Homework]:
+    async def get_all_homeworks() -> List[Homework]:
         """
         Получить все домашние работы
 
         Returns:
             Список всех домашних работ
         """
-        db = get_db()
+        db = get_async_db()
         try:
-            homeworks = db.query(Homework).order_by(Homework.created_at.desc()).all()
+            homeworks = (await db.scalars(select(Homework).order_by(Homework.created_at.desc()))).all()
             return homeworks
         finally:
-            db.close()
+            await db.close()
 
     @staticmethod
-    def get_active_homeworks() -> List[Homework]:
+    async def get_active_homeworks() -> List[Homework]:
         """
         Получить активные домашние работы
 
         Returns:
             Список активных домашних работ
         """
-        db = get_db()
+        db = get_async_db()
         try:
-            homeworks = db.query(Homework).filter(
+            homeworks = (await db.scalars(select(Homework).where(
                 Homework.is_active == True
-            ).order_by(Homework.created_at.desc()).all()
+            ).order_by(Homework.created_at.desc()))).all()
             return homeworks
         finally:
-            db.close()
+            await db.close()
 
     @staticmethod
-    def get_homework_by_kim(kim: int) -> Optional[Homework]:
+    async def get_homework_by_kim(kim: int) -> Optional[Homework]:
         """
         Получить домашнюю работу по KIM
 
@@ -402,15 +638,15 @@ class HomeworkCRUD:
         Returns:
             Домашняя работа или None
         """
-        db = get_db()
+        db = get_async_db()
         try:
-            homework = db.query(Homework).filter(Homework.kim == kim).first()
+            homework = await db.scalar(select(Homework).where(Homework.kim == kim))
             return homework
         finally:
-            db.close()
+            await db.close()
 
     @staticmethod
-    def toggle_homework_status(kim: int) -> Optional[Homework]:
+    async def toggle_homework_status(kim: int) -> Optional[Homework]:
         """
         Переключить статус домашней работы (активна/неактивна)
 
@@ -420,20 +656,20 @@ class HomeworkCRUD:
         Returns:
             Обновленная домашняя работа или None
         """
-        db = get_db()
+        db = get_async_db()
         try:
-            homework = db.query(Homework).filter(Homework.kim == kim).first()
+            homework = await db.scalar(select(Homework).where(Homework.kim == kim))
             if homework:
                 homework.is_active = not homework.is_active
-                db.commit()
-                db.refresh(homework)
+                await db.commit()
+                await db.refresh(homework)
                 return homework
             return None
         finally:
-            db.close()
+            await db.close()
 
     @staticmethod
-    def delete_homework(kim: int) -> bool:
+    async def delete_homework(kim: int) -> bool:
         """
         Удалить домашнюю работу
 
@@ -443,19 +679,19 @@ class HomeworkCRUD:
         Returns:
             True если удалено, False если не найдено
         """
-        db = get_db()
+        db = get_async_db()
         try:
-            homework = db.query(Homework).filter(Homework.kim == kim).first()
+            homework = await db.scalar(select(Homework).where(Homework.kim == kim))
             if homework:
-                db.delete(homework)
-                db.commit()
+                await db.delete(homework)
+                await db.commit()
                 return True
             return False
         finally:
-            db.close()
+            await db.close()
 
     @staticmethod
-    def update_homework_title(kim: int, title: str) -> Optional[Homework]:
+    async def update_homework_title(kim: int, title: str) -> Optional[Homework]:
         """
         Обновить название домашней работы
 
@@ -466,14 +702,412 @@ class HomeworkCRUD:
         Returns:
             Обновленная домашняя работа или None
         """
-        db = get_db()
+        db = get_async_db()
         try:
-            homework = db.query(Homework).filter(Homework.kim == kim).first()
+            homework = await db.scalar(select(Homework).where(Homework.kim == kim))
             if homework:
                 homework.title = title
-                db.commit()
-                db.refresh(homework)
+                await db.commit()
+                await db.refresh(homework)
                 return homework
             return None
         finally:
-            db.close()
+            await db.close()
+
+    @staticmethod
+    async def update_homework_catalog(kim: int, description: str, task_count: int) -> Optional[Homework]:
+        """
+        Обновить сохранённые данные варианта (описание и количество заданий)
+
+        Args:
+            kim: ID варианта
+            description: Описание варианта
+            task_count: Количество заданий
+
+        Returns:
+            Обновленная домашняя работа или None
+        """
+        db = get_async_db()
+        try:
+            homework = await db.scalar(select(Homework).where(Homework.kim == kim))
+            if homework:
+                homework.description = description
+                homework.task_count = task_count
+                homework.synced_at = datetime.now()
+                await db.commit()
+                await db.refresh(homework)
+                return homework
+            return None
+        finally:
+            await db.close()
+
+
+class KimSnapshotCRUD:
+    """CRUD операции для сохранённых копий вариантов kompege.ru"""
+
+    @staticmethod
+    async def get_snapshot(kim: int) -> Optional[KimSnapshot]:
+        """
+        Получить сохранённую копию варианта
+
+        Args:
+            kim: ID варианта
+
+        Returns:
+            Копия варианта или None
+        """
+        db = get_async_db()
+        try:
+            snapshot = await db.scalar(select(KimSnapshot).where(KimSnapshot.kim == kim))
+            return snapshot
+        finally:
+            await db.close()
+
+    @staticmethod
+    async def save_snapshot(kim: int, payload: str, payload_hash: str,
+                            etag: Optional[str] = None,
+                            last_modified: Optional[str] = None) -> KimSnapshot:
+        """
+        Сохранить (или обновить) копию варианта
+
+        Args:
+            kim: ID варианта
+            payload: JSON ответа API
+            payload_hash: Хэш payload
+            etag: Заголовок ETag ответа
+            last_modified: Заголовок Last-Modified ответа
+
+        Returns:
+            Сохранённая копия
+        """
+        db = get_async_db()
+        try:
+            now = datetime.now()
+            snapshot = await db.scalar(select(KimSnapshot).where(KimSnapshot.kim == kim))
+            if snapshot is None:
+                snapshot = KimSnapshot(kim=kim)
+                db.add(snapshot)
+
+            if snapshot.payload_hash != payload_hash:
+                snapshot.payload = payload
+                snapshot.payload_hash = payload_hash
+                snapshot.fetched_at = now
+            snapshot.etag = etag
+            snapshot.last_modified = last_modified
+            snapshot.checked_at = now
+
+            await db.commit()
+            await db.refresh(snapshot)
+            return snapshot
+        finally:
+            await db.close()
+
+    @staticmethod
+    async def touch_snapshot(kim: int) -> bool:
+        """
+        Отметить, что копия варианта подтверждена сервером (304 Not Modified)
+
+        Args:
+            kim: ID варианта
+
+        Returns:
+            True если обновлено, False если копия не найдена
+        """
+        db = get_async_db()
+        try:
+            snapshot = await db.scalar(select(KimSnapshot).where(KimSnapshot.kim == kim))
+            if snapshot:
+                snapshot.checked_at = datetime.now()
+                await db.commit()
+                return True
+            return False
+        finally:
+            await db.close()
+
+
+class StartHintCacheCRUD:
+    """CRUD операции для сохранённых подсказок «Как начать?»"""
+
+    @staticmethod
+    async def get_hint(task_id: int, solution_hash: str, prompt_version: int) -> Optional[str]:
+        """
+        Получить сохранённую подсказку
+
+        Args:
+            task_id: ID задачи
+            solution_hash: Хэш эталонного решения
+            prompt_version: Версия промпта
+
+        Returns:
+            Текст подсказки или None
+        """
+        db = get_async_db()
+        try:
+            cached = await db.scalar(select(StartHintCache).where(
+                StartHintCache.task_id == task_id,
+                StartHintCache.solution_hash == solution_hash,
+                StartHintCache.prompt_version == prompt_version
+            ).limit(1))
+            return cached.hint_text if cached else None
+        finally:
+            await db.close()
+
+    @staticmethod
+    async def save_hint(task_id: int, solution_hash: str, prompt_version: int, hint_text: str) -> None:
+        """
+        Сохранить подсказку
+
+        Args:
+            task_id: ID задачи
+            solution_hash: Хэш эталонного решения
+            prompt_version: Версия промпта
+            hint_text: Текст подсказки
+        """
+        db = get_async_db()
+        try:
+            db.add(StartHintCache(
+                task_id=task_id,
+                solution_hash=solution_hash,
+                prompt_version=prompt_version,
+                hint_text=hint_text
+            ))
+            await db.commit()
+        except IntegrityError:
+            # Подсказку уже сохранил параллельный запрос
+            await db.rollback()
+        finally:
+            await db.close()
+
+    @staticmethod
+    async def invalidate_task(db: AsyncSession, task_id: int) -> None:
+        """
+        Удалить сохранённые подсказки задачи в рамках текущей транзакции
+
+        Args:
+            db: Сессия БД, в которой изменяются решения задачи
+            task_id: ID задачи
+        """
+        await db.execute(delete(StartHintCache).where(
+            StartHintCache.task_id == task_id
+        ))
+
+
+class LLMCallCRUD:
+    """CRUD операции для учёта запросов к LLM"""
+
+    @staticmethod
+    async def add_call(hint_type: str, outcome: str, task_id: Optional[int] = None,
+                       model: Optional[str] = None, prompt_tokens: Optional[int] = None,
+                       completion_tokens: Optional[int] = None, latency_ms: Optional[int] = None,
+                       ttft_ms: Optional[int] = None) -> LLMCall:
+        """
+        Записать запрос к LLM
+
+        Args:
+            hint_type: Тип запроса ('start', 'analyze' или 'warmup')
+            outcome: Результат ('ok', 'empty', 'error' или 'circuit_open')
+            task_id: ID задачи
+            model: Модель, которая дала ответ
+            prompt_tokens: Токены запроса
+            completion_tokens: Токены ответа
+            latency_ms: Полное время запроса в миллисекундах
+            ttft_ms: Время до первого фрагмента в миллисекундах
+
+        Returns:
+            Созданная запись
+        """
+        db = get_async_db()
+        try:
+            call = LLMCall(
+                hint_type=hint_type,
+                outcome=outcome,
+                task_id=task_id,
+                model=model,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                latency_ms=latency_ms,
+                ttft_ms=ttft_ms
+            )
+            db.add(call)
+            await db.commit()
+            await db.refresh(call)
+            return call
+        finally:
+            await db.close()
+
+    @staticmethod
+    async def attach_hint(call_id: int, hint_id: int) -> bool:
+        """
+        Связать запрос к LLM с сохранённой подсказкой
+
+        Args:
+            call_id: ID записи о запросе
+            hint_id: ID подсказки
+
+        Returns:
+            True если связано, False если запись не найдена
+        """
+        db = get_async_db()
+        try:
+            result = await db.execute(
+                update(LLMCall).where(LLMCall.id == call_id).values(hint_id=hint_id)
+            )
+            await db.commit()
+            return bool(result.rowcount)
+        finally:
+            await db.close()
+
+    @staticmethod
+    async def get_call_stats(days: int = 7, price_prompt: float = 0.0,
+                             price_completion: float = 0.0) -> dict:
+        """
+        Получить статистику запросов к LLM по типам подсказок
+
+        Args:
+            days: За сколько дней показывать статистику
+            price_prompt: Цена за 1M токенов запроса
+            price_completion: Цена за 1M токенов ответа
+
+        Returns:
+            Словарь тип -> {calls, errors, prompt_tokens, completion_tokens,
+            cost, p50_ms, p95_ms}
+        """
+        db = get_async_db()
+        try:
+            since_date = datetime.now() - timedelta(days=days)
+            rows = (await db.execute(select(
+                LLMCall.hint_type,
+                LLMCall.outcome,
+                LLMCall.prompt_tokens,
+                LLMCall.completion_tokens,
+                LLMCall.latency_ms
+            ).where(LLMCall.created_at >= since_date))).all()
+
+            stats = {}
+            latencies = {}
+            for hint_type, outcome, prompt_tokens, completion_tokens, latency_ms in rows:
+                item = stats.setdefault(hint_type, {
+                    'calls': 0,
+                    'errors': 0,
+                    'prompt_tokens': 0,
+                    'completion_tokens': 0
+                })
+                item['calls'] += 1
+                if outcome not in ('ok', 'empty', 'cancelled'):
+                    item['errors'] += 1
+                item['prompt_tokens'] += prompt_tokens or 0
+                item['completion_tokens'] += completion_tokens or 0
+                if outcome == 'ok' and latency_ms is not None:
+                    latencies.setdefault(hint_type, []).append(latency_ms)
+
+            for hint_type, item in stats.items():
+                item['cost'] = (
+                    item['prompt_tokens'] * price_prompt +
+                    item['completion_tokens'] * price_completion
+                ) / 1_000_000
+                ordered = sorted(latencies.get(hint_type, []))
+                item['p50_ms'] = _percentile(ordered, 50)
+                item['p95_ms'] = _percentile(ordered, 95)
+
+            return stats
+        finally:
+            await db.close()
+
+
+class TaskTestCRUD:
+    """CRUD операции для входных данных тестов задач"""
+
+    @staticmethod
+    async def add_test(task_id: int, input_data: str) -> TaskTest:
+        """
+        Добавить входные данные для проверки решений задачи
+
+        Args:
+            task_id: ID задачи
+            input_data: Содержимое stdin
+
+        Returns:
+            Созданный тест
+        """
+        db = get_async_db()
+        try:
+            test = TaskTest(task_id=task_id, input_data=input_data)
+            db.add(test)
+            await db.commit()
+            await db.refresh(test)
+            return test
+        finally:
+            await db.close()
+
+    @staticmethod
+    async def get_tests_by_task(task_id: int) -> List[TaskTest]:
+        """
+        Получить тесты задачи в порядке добавления
+
+        Args:
+            task_id: ID задачи
+
+        Returns:
+            Список тестов
+        """
+        db = get_async_db()
+        try:
+            tests = (await db.scalars(select(TaskTest).where(
+                TaskTest.task_id == task_id
+            ).order_by(TaskTest.id))).all()
+            return tests
+        finally:
+            await db.close()
+
+    @staticmethod
+    async def get_test_by_id(test_id: int) -> Optional[TaskTest]:
+        """
+        Получить тест по ID
+
+        Args:
+            test_id: ID теста
+
+        Returns:
+            Тест или None
+        """
+        db = get_async_db()
+        try:
+            test = await db.scalar(select(TaskTest).where(TaskTest.id == test_id))
+            return test
+        finally:
+            await db.close()
+
+    @staticmethod
+    async def delete_test(test_id: int) -> bool:
+        """
+        Удалить тест
+
+        Args:
+            test_id: ID теста
+
+        Returns:
+            True если удалено, False если не найдено
+        """
+        db = get_async_db()
+        try:
+            test = await db.scalar(select(TaskTest).where(TaskTest.id == test_id))
+            if test:
+                await db.delete(test)
+                await db.commit()
+                return True
+            return False
+        finally:
+            await db.close()
+
+
+def _empty_hint_counters() -> dict:
+    """Нулевые счётчики статистики подсказок"""
+    return {'total': 0, 'helpful': 0, 'not_helpful': 0, 'not_rated': 0}
+
+
+def _percentile(ordered: List[int], percentile: float) -> Optional[int]:
+    """Перцентиль отсортированного списка (None для пустого)"""
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
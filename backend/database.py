@@ -1,4 +1,11 @@
-from sqlalchemy import create_engine, Column, Integer, Text, DateTime, Boolean, BigInteger
+from sqlalchemy import (
+    create_engine, event, Column, Integer, Text, Date, DateTime, Boolean, BigInteger,
+    UniqueConstraint, ForeignKey, Index
+)
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -28,7 +35,7 @@ class Hint(Base):
     user_id = Column(BigInteger, nullable=False, index=True)  # Telegram user ID
     task_id = Column(Integer, nullable=False, index=True)
     hint_text = Column(Text, nullable=False)
-    hint_type = Column(Text, nullable=False)  # 'start' или 'analyze'
+    hint_type = Column(Text, nullable=False)  # 'start', 'analyze', 'syntax' или 'heuristic'
     was_helpful = Column(Boolean, nullable=True, default=None)  # None = не оценено
     created_at = Column(DateTime, default=datetime.now, index=True)
 
@@ -36,6 +43,51 @@ class Hint(Base):
         return f"<Hint(id={self.id}, user_id={self.user_id}, task_id={self.task_id})>"
 
 
+# Составные индексы для выборок с сортировкой по времени (для существующих БД
+# создаются миграцией 1, см. backend/migrations.py)
+Index('ix_hints_user_id_created_at', Hint.user_id, Hint.created_at.desc())
+Index('ix_hints_task_id_created_at', Hint.task_id, Hint.created_at)
+
+
+class HintDailyStat(Base):
+    """Модель дневной сводки по подсказкам (задача и тип подсказки за день)"""
+    __tablename__ = 'hint_daily_stats'
+    __table_args__ = (
+        UniqueConstraint('day', 'task_id', 'hint_type'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False, index=True)
+    task_id = Column(Integer, nullable=False)
+    hint_type = Column(Text, nullable=False)
+    total = Column(Integer, nullable=False, default=0)  # Выдано подсказок
+    helpful = Column(Integer, nullable=False, default=0)  # Оценено как полезные
+    not_helpful = Column(Integer, nullable=False, default=0)  # Оценено как бесполезные
+
+    def __repr__(self):
+        return f"<HintDailyStat(day={self.day}, task_id={self.task_id}, type={self.hint_type})>"
+
+
+class LLMCall(Base):
+    """Модель учёта запроса к LLM (токены, задержка, результат)"""
+    __tablename__ = 'llm_calls'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    hint_id = Column(Integer, ForeignKey('hints.id'), nullable=True, index=True)  # Выданная подсказка
+    hint_type = Column(Text, nullable=False)  # 'start', 'analyze' или 'warmup'
+    task_id = Column(Integer, nullable=True)
+    model = Column(Text, nullable=True)  # Модель, которая дала ответ
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    latency_ms = Column(Integer, nullable=True)  # Полное время запроса
+    ttft_ms = Column(Integer, nullable=True)  # Время до первого фрагмента (для потоков)
+    outcome = Column(Text, nullable=False)  # 'ok', 'empty', 'error', 'circuit_open' или 'cancelled'
+    created_at = Column(DateTime, default=datetime.now, index=True)
+
+    def __repr__(self):
+        return f"<LLMCall(id={self.id}, type={self.hint_type}, outcome={self.outcome})>"
+
+
 class Homework(Base):
     """Модель домашней работы"""
     __tablename__ = 'homeworks'
@@ -45,21 +97,166 @@ class Homework(Base):
     title = Column(Text, nullable=True)  # Название (опционально)
     is_active = Column(Boolean, default=True, nullable=False)  # Доступна ли работа
     created_at = Column(DateTime, default=datetime.now)
+    description = Column(Text, nullable=True)  # Описание варианта с kompege.ru
+    task_count = Column(Integer, nullable=True)  # Количество заданий
+    synced_at = Column(DateTime, nullable=True)  # Когда данные синхронизированы с kompege.ru
 
     def __repr__(self):
         return f"<Homework(id={self.id}, kim={self.kim}, active={self.is_active})>"
 
 
+Index('ix_homeworks_is_active_created_at', Homework.is_active, Homework.created_at)
+
+
+class KimSnapshot(Base):
+    """Модель сохранённой копии данных варианта kompege.ru"""
+    __tablename__ = 'kim_snapshots'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kim = Column(Integer, nullable=False, unique=True, index=True)  # ID варианта
+    payload = Column(Text, nullable=False)  # JSON ответа API
+    payload_hash = Column(Text, nullable=False)  # SHA-256 от payload
+    etag = Column(Text, nullable=True)  # Заголовок ETag
+    last_modified = Column(Text, nullable=True)  # Заголовок Last-Modified
+    fetched_at = Column(DateTime, default=datetime.now)  # Когда изменилось содержимое
+    checked_at = Column(DateTime, default=datetime.now)  # Когда последний раз проверяли
+
+    def __repr__(self):
+        return f"<KimSnapshot(id={self.id}, kim={self.kim}, hash={self.payload_hash[:8]})>"
+
+
+class StartHintCache(Base):
+    """Модель сохранённой подсказки «Как начать?» для задачи"""
+    __tablename__ = 'start_hint_cache'
+    __table_args__ = (
+        UniqueConstraint('task_id', 'solution_hash', 'prompt_version'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    task_id = Column(Integer, nullable=False, index=True)
+    solution_hash = Column(Text, nullable=False)  # SHA-256 эталонного решения
+    prompt_version = Column(Integer, nullable=False)  # Версия промпта
+    hint_text = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return f"<StartHintCache(id={self.id}, task_id={self.task_id}, v={self.prompt_version})>"
+
+
+class TaskTest(Base):
+    """Модель входных данных для проверки решений задачи"""
+    __tablename__ = 'task_tests'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    task_id = Column(Integer, nullable=False, index=True)
+    input_data = Column(Text, nullable=False)  # Содержимое stdin
+    created_at = Column(DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return f"<TaskTest(id={self.id}, task_id={self.task_id})>"
+
+
+# Профили настройки SQLite: PRAGMA, применяемые к каждому новому соединению
+SQLITE_PROFILES = {
+    # Настройки SQLite по умолчанию (журнал отката, synchronous=FULL)
+    'default': {},
+    # WAL: читатели не блокируются писателем, fsync только на контрольных точках
+    'wal': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,  # байт
+        'cache_size': -64 * 1024,  # отрицательное значение - в КиБ
+        'busy_timeout': 5000,  # мс ожидания блокировки вместо ошибки "database is locked"
+        'temp_store': 'MEMORY',
+    },
+}
+
+
+def create_sqlite_engine(path: str, profile: str = 'wal', pool_size: int = 5, max_overflow: int = 10):
+    """
+    Создать движок SQLite с профилем настроек
+
+    Args:
+        path: Путь к файлу БД
+        profile: Название профиля из SQLITE_PROFILES
+        pool_size: Количество постоянно открытых соединений
+        max_overflow: Сколько соединений можно открыть сверх pool_size
+
+    Returns:
+        Движок SQLAlchemy
+    """
+    new_engine = create_engine(
+        f'sqlite:///{path}',
+        echo=False,
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        # Сессии открываются из разных потоков, соединение отдаёт пул
+        connect_args={'check_same_thread': False}
+    )
+
+    _apply_profile(new_engine, profile)
+    return new_engine
+
+
+def create_async_sqlite_engine(path: str, profile: str = 'wal', pool_size: int = 5,
+                               max_overflow: int = 10) -> AsyncEngine:
+    """
+    Создать асинхронный движок SQLite (aiosqlite) с профилем настроек
+
+    Args:
+        path: Путь к файлу БД
+        profile: Название профиля из SQLITE_PROFILES
+        pool_size: Количество постоянно открытых соединений
+        max_overflow: Сколько соединений можно открыть сверх pool_size
+
+    Returns:
+        Асинхронный движок SQLAlchemy
+    """
+    new_engine = create_async_engine(
+        f'sqlite+aiosqlite:///{path}',
+        echo=False,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow
+    )
+    _apply_profile(new_engine.sync_engine, profile)
+    return new_engine
+
+
+def _apply_profile(target_engine, profile: str) -> None:
+    """Применять PRAGMA профиля к каждому новому соединению движка"""
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Неизвестный профиль SQLite: {profile}")
+    pragmas = SQLITE_PROFILES[profile]
+
+    @event.listens_for(target_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
 # Создание движка БД
 import os
 DB_PATH = os.getenv('DB_PATH', '/app/data/homework_bot.db')
-engine = create_engine(f'sqlite:///{DB_PATH}', echo=False)
+DB_PROFILE = os.getenv('DB_PROFILE', 'wal')
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+engine = create_sqlite_engine(DB_PATH, DB_PROFILE, DB_POOL_SIZE, DB_MAX_OVERFLOW)
+# Асинхронный движок для запросов из обработчиков (не блокирует event loop)
+async_engine = create_async_sqlite_engine(DB_PATH, DB_PROFILE, DB_POOL_SIZE, DB_MAX_OVERFLOW)
 
 # Создание таблиц
 Base.metadata.create_all(engine)
 
 # Создание сессии
 SessionLocal = sessionmaker(bind=engine)
+# Объекты остаются доступны после commit и закрытия сессии
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
 
 
 def get_db():
@@ -69,3 +266,8 @@ def get_db():
         return db
     finally:
         pass
+
+
+def get_async_db() -> AsyncSession:
+    """Получить асинхронную сессию БД"""
+    return AsyncSessionLocal()
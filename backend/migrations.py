@@ -0,0 +1,129 @@
+"""
+Версионированные миграции схемы БД
+
+create_all создаёт только отсутствующие таблицы, а индексы и прочие
+изменения существующей БД описываются здесь. Номер применённой миграции
+хранится в PRAGMA user_version. Каждая миграция выполняется в отдельной
+транзакции вместе с обновлением номера.
+
+Миграции применяются при запуске бота (client_bot/bot.py) и командой
+python migrate.py.
+"""
+
+from typing import Callable, List, Tuple, Union
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+
+# Шаг миграции - SQL-команда или функция, получающая соединение
+Step = Union[str, Callable[[Connection], None]]
+
+
+def _add_column(table: str, column: str, column_type: str) -> Callable[[Connection], None]:
+    """
+    Шаг миграции: добавить колонку, если её ещё нет
+
+    В SQLite нет ADD COLUMN IF NOT EXISTS, а в таблицах, созданных
+    create_all по текущим моделям, колонка уже есть.
+    """
+    def step(conn: Connection) -> None:
+        existing = {row[1] for row in conn.execute(text(f'PRAGMA table_info({table})'))}
+        if column not in existing:
+            conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}'))
+    return step
+
+
+def _backfill_hint_daily_stats(conn: Connection) -> None:
+    """Шаг миграции: заполнить дневные сводки по уже выданным подсказкам"""
+    if conn.execute(text('SELECT 1 FROM hint_daily_stats LIMIT 1')).first():
+        return
+    conn.execute(text(
+        'INSERT INTO hint_daily_stats (day, task_id, hint_type, total, helpful, not_helpful) '
+        'SELECT date(created_at), task_id, hint_type, COUNT(*), '
+        'COALESCE(SUM(was_helpful = 1), 0), COALESCE(SUM(was_helpful = 0), 0) '
+        'FROM hints GROUP BY date(created_at), task_id, hint_type'
+    ))
+
+
+# (версия, описание, шаги) - новые миграции добавляются в конец
+MIGRATIONS: List[Tuple[int, str, List[Step]]] = [
+    (1, 'Составные индексы для выборок подсказок и активных работ', [
+        'CREATE INDEX IF NOT EXISTS ix_hints_user_id_created_at ON hints (user_id, created_at DESC)',
+        'CREATE INDEX IF NOT EXISTS ix_hints_task_id_created_at ON hints (task_id, created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_homeworks_is_active_created_at ON homeworks (is_active, created_at)',
+    ]),
+    (2, 'Пересчёт дневных сводок при оценке подсказки триггером', [
+        # mark_helpful - один UPDATE hints; прежняя оценка доступна только триггеру
+        'CREATE TRIGGER IF NOT EXISTS trg_hints_rating_daily_stats '
+        'AFTER UPDATE OF was_helpful ON hints '
+        'WHEN OLD.was_helpful IS NOT NEW.was_helpful '
+        'BEGIN '
+        'UPDATE hint_daily_stats SET '
+        'helpful = helpful + (NEW.was_helpful IS 1) - (OLD.was_helpful IS 1), '
+        'not_helpful = not_helpful + (NEW.was_helpful IS 0) - (OLD.was_helpful IS 0) '
+        'WHERE day = date(NEW.created_at) AND task_id = NEW.task_id AND hint_type = NEW.hint_type; '
+        'END',
+    ]),
+    (3, 'Каталог заданий домашних работ из Kompege', [
+        _add_column('homeworks', 'description', 'TEXT'),
+        _add_column('homeworks', 'task_count', 'INTEGER'),
+        _add_column('homeworks', 'synced_at', 'DATETIME'),
+    ]),
+    (4, 'Дневные сводки по подсказкам, выданным до появления hint_daily_stats', [
+        _backfill_hint_daily_stats,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(engine: Engine) -> int:
+    """
+    Получить номер последней применённой миграции
+
+    Args:
+        engine: Движок SQLAlchemy
+
+    Returns:
+        Версия схемы (0 - миграции не применялись)
+    """
+    with engine.connect() as conn:
+        return conn.execute(text('PRAGMA user_version')).scalar()
+
+
+def get_pending(engine: Engine) -> List[Tuple[int, str, List[Step]]]:
+    """
+    Получить ещё не применённые миграции
+
+    Args:
+        engine: Движок SQLAlchemy
+
+    Returns:
+        Список миграций по возрастанию версии
+    """
+    version = get_version(engine)
+    return [migration for migration in MIGRATIONS if migration[0] > version]
+
+
+def upgrade(engine: Engine) -> List[int]:
+    """
+    Применить все ожидающие миграции
+
+    Args:
+        engine: Движок SQLAlchemy
+
+    Returns:
+        Версии применённых миграций
+    """
+    applied = []
+    for version, _description, steps in get_pending(engine):
+        with engine.begin() as conn:
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(text(step))
+            # PRAGMA не поддерживает параметры, версия - целое число из списка выше
+            conn.execute(text(f'PRAGMA user_version = {int(version)}'))
+        applied.append(version)
+    return applied
@@ -0,0 +1,187 @@
+"""
+Проверка планов запросов CRUD-методов
+
+Каждый публичный метод классов *CRUD из backend/crud.py вызывается на
+временной БД, выполненные им SELECT/UPDATE/DELETE перехватываются и
+прогоняются через EXPLAIN QUERY PLAN. Проверка не проходит, если какой-то
+запрос читает таблицу целиком (SCAN) и метод не входит в FULL_SCAN_ALLOWED,
+или если для метода нет вызова в _exercise.
+
+Запуск:
+    python migrate.py check
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import inspect
+import shutil
+import tempfile
+from datetime import date
+
+# Модуль БД при импорте создаёт движок по DB_PATH - направляем его во временный файл
+_workdir = tempfile.mkdtemp(prefix='query_plan_check_')
+os.environ['DB_PATH'] = os.path.join(_workdir, 'check.db')
+
+from sqlalchemy import event
+from backend import crud
+from backend.crud import (
+    SolutionCRUD, HintCRUD, HomeworkCRUD, KimSnapshotCRUD, StartHintCacheCRUD,
+    LLMCallCRUD, TaskTestCRUD
+)
+from backend.database import engine, async_engine, get_async_db
+from backend.migrations import upgrade
+
+
+# Методы, которым полный просмотр таблицы нужен по смыслу
+FULL_SCAN_ALLOWED = {
+    'SolutionCRUD.get_all_solutions',  # весь список решений
+    'SolutionCRUD.count_all_solutions',  # COUNT(*), результат кэшируется
+    'HomeworkCRUD.get_all_homeworks',  # весь список работ (админка)
+    'HintCRUD.get_recent_hints',  # обход индекса по created_at с LIMIT
+}
+
+
+async def _exercise(call) -> None:
+    """Вызвать все CRUD-методы; call(имя, корутина) запоминает, чей это запрос"""
+    solution = await call('SolutionCRUD.add_solution', SolutionCRUD.add_solution(1, 'print(1)', 'комментарий'))
+    await call('SolutionCRUD.get_solutions_by_task_id', SolutionCRUD.get_solutions_by_task_id(1))
+    await call('SolutionCRUD.count_solutions_by_task', SolutionCRUD.count_solutions_by_task(2))
+    await call('SolutionCRUD.get_solution_by_id', SolutionCRUD.get_solution_by_id(solution.id))
+    await call('SolutionCRUD.update_solution', SolutionCRUD.update_solution(solution.id, comment='новый'))
+    await call('SolutionCRUD.get_all_solutions', SolutionCRUD.get_all_solutions())
+    await call('SolutionCRUD.count_all_solutions', SolutionCRUD.count_all_solutions())
+    await call('SolutionCRUD.get_solutions_page', SolutionCRUD.get_solutions_page())
+    await call('SolutionCRUD.get_solutions_page', SolutionCRUD.get_solutions_page(after_id=solution.id))
+    await call('SolutionCRUD.get_solutions_page', SolutionCRUD.get_solutions_page(before_id=solution.id + 1))
+    await call('SolutionCRUD.delete_solution', SolutionCRUD.delete_solution(solution.id))
+
+    hint = await call('HintCRUD.add_hint', HintCRUD.add_hint(1, 1, 'подсказка', 'start'))
+    await call('HintCRUD.mark_helpful', HintCRUD.mark_helpful(hint.id, 1, was_helpful=True))
+    await call('HintCRUD.get_user_hints', HintCRUD.get_user_hints(1))
+    await call('HintCRUD.get_recent_hints', HintCRUD.get_recent_hints())
+    await call('HintCRUD.get_task_hints', HintCRUD.get_task_hints(1))
+    await call('HintCRUD.get_hint_stats', HintCRUD.get_hint_stats(days=7))
+    await call('HintCRUD.get_hint_stats', HintCRUD.get_hint_stats(date_from=date.today(), date_to=date.today()))
+    await call('HintCRUD.get_latest_hint_for_user', HintCRUD.get_latest_hint_for_user(1))
+
+    await call('HomeworkCRUD.add_homework', HomeworkCRUD.add_homework(1))
+    await call('HomeworkCRUD.get_all_homeworks', HomeworkCRUD.get_all_homeworks())
+    await call('HomeworkCRUD.get_active_homeworks', HomeworkCRUD.get_active_homeworks())
+    await call('HomeworkCRUD.get_homework_by_kim', HomeworkCRUD.get_homework_by_kim(1))
+    await call('HomeworkCRUD.toggle_homework_status', HomeworkCRUD.toggle_homework_status(1))
+    await call('HomeworkCRUD.update_homework_title', HomeworkCRUD.update_homework_title(1, 'ДЗ'))
+    await call('HomeworkCRUD.update_homework_catalog', HomeworkCRUD.update_homework_catalog(1, 'ДЗ', 2))
+    await call('HomeworkCRUD.delete_homework', HomeworkCRUD.delete_homework(1))
+
+    await call('KimSnapshotCRUD.save_snapshot', KimSnapshotCRUD.save_snapshot(1, '{}', 'hash'))
+    await call('KimSnapshotCRUD.get_snapshot', KimSnapshotCRUD.get_snapshot(1))
+    await call('KimSnapshotCRUD.touch_snapshot', KimSnapshotCRUD.touch_snapshot(1))
+
+    await call('StartHintCacheCRUD.save_hint', StartHintCacheCRUD.save_hint(1, 'hash', 1, 'подсказка'))
+    await call('StartHintCacheCRUD.get_hint', StartHintCacheCRUD.get_hint(1, 'hash', 1))
+    db = get_async_db()
+    try:
+        await call('StartHintCacheCRUD.invalidate_task', StartHintCacheCRUD.invalidate_task(db, 1))
+    finally:
+        await db.close()
+
+    llm_call = await call('LLMCallCRUD.add_call', LLMCallCRUD.add_call('start', 'ok', task_id=1))
+    await call('LLMCallCRUD.attach_hint', LLMCallCRUD.attach_hint(llm_call.id, hint.id))
+    await call('LLMCallCRUD.get_call_stats', LLMCallCRUD.get_call_stats())
+
+    test = await call('TaskTestCRUD.add_test', TaskTestCRUD.add_test(1, '1 2'))
+    await call('TaskTestCRUD.get_tests_by_task', TaskTestCRUD.get_tests_by_task(1))
+    await call('TaskTestCRUD.get_test_by_id', TaskTestCRUD.get_test_by_id(test.id))
+    await call('TaskTestCRUD.delete_test', TaskTestCRUD.delete_test(test.id))
+
+
+def _crud_methods() -> set:
+    """Имена всех публичных методов классов *CRUD"""
+    names = set()
+    for class_name, cls in inspect.getmembers(crud, inspect.isclass):
+        if not class_name.endswith('CRUD') or cls.__module__ != crud.__name__:
+            continue
+        for method_name, _ in inspect.getmembers(cls, inspect.isroutine):
+            if not method_name.startswith('_'):
+                names.add(f'{class_name}.{method_name}')
+    return names
+
+
+async def _capture() -> tuple:
+    """
+    Выполнить CRUD-методы и собрать их запросы
+
+    Returns:
+        (список (метод, SQL, параметры), множество вызванных методов)
+    """
+    queries = []
+    called = set()
+    current = ['']
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().split(None, 1)[0].upper() in ('SELECT', 'UPDATE', 'DELETE'):
+            queries.append((current[0], statement, parameters))
+
+    async def call(name, coro):
+        current[0] = name
+        called.add(name)
+        try:
+            return await coro
+        finally:
+            current[0] = ''
+
+    event.listen(async_engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        await _exercise(call)
+    finally:
+        event.remove(async_engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+        await async_engine.dispose()
+    return queries, called
+
+
+def run_check() -> int:
+    """
+    Проверить планы запросов всех CRUD-методов
+
+    Returns:
+        Количество найденных проблем (0 - проверка пройдена)
+    """
+    upgrade(engine)
+    queries, called = asyncio.run(_capture())
+    problems = 0
+
+    for name in sorted(_crud_methods() - called):
+        print(f"❌ {name}: метод не вызывается в проверке")
+        problems += 1
+
+    with engine.connect() as conn:
+        for name, statement, parameters in queries:
+            plan = [row[3] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+            full_scan = any(detail.startswith('SCAN') for detail in plan)
+            if full_scan and name not in FULL_SCAN_ALLOWED:
+                mark = '❌'
+                problems += 1
+            else:
+                mark = '✅'
+            print(f"{mark} {name}: {' '.join(statement.split())[:100]}")
+            for detail in plan:
+                print(f"      {detail}")
+
+    print(f"\nЗапросов: {len(queries)}, проблем: {problems}")
+    return problems
+
+
+def main() -> int:
+    """Запустить проверку и удалить временную БД"""
+    try:
+        return 1 if run_check() else 0
+    finally:
+        engine.dispose()
+        shutil.rmtree(_workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
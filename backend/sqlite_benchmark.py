@@ -0,0 +1,137 @@
+"""
+Сравнение профилей SQLite на нагрузке, похожей на работу бота
+
+Несколько потоков записывают подсказки (каждая запись - отдельная
+транзакция, как в HintCRUD.add_hint), одновременно другие потоки читают
+статистику (как в HintCRUD.get_hint_stats). Для каждого профиля создаётся
+отдельная временная БД.
+
+Запуск:
+    python backend/sqlite_benchmark.py --writes 2000 --writers 4 --readers 2
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import shutil
+import tempfile
+import threading
+import time
+
+# Модуль БД при импорте создаёт движок по DB_PATH - направляем его во временный файл
+_workdir = tempfile.mkdtemp(prefix='sqlite_benchmark_')
+os.environ['DB_PATH'] = os.path.join(_workdir, 'import.db')
+
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+from backend.database import Base, Hint, SQLITE_PROFILES, create_sqlite_engine
+
+
+def _percentile(values: list, percentile: float) -> float:
+    """Перцентиль списка (0 для пустого)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))]
+
+
+def run_profile(profile: str, writes: int, writers: int, readers: int) -> dict:
+    """
+    Прогнать нагрузку на одном профиле
+
+    Args:
+        profile: Название профиля из SQLITE_PROFILES
+        writes: Общее количество записей
+        writers: Количество пишущих потоков
+        readers: Количество читающих потоков
+
+    Returns:
+        Словарь с пропускной способностью и задержками
+    """
+    engine = create_sqlite_engine(
+        os.path.join(_workdir, f'{profile}.db'), profile,
+        pool_size=writers + readers, max_overflow=0
+    )
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    write_latencies = []
+    reads = [0]
+    errors = [0]
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def writer(count: int) -> None:
+        for i in range(count):
+            started_at = time.perf_counter()
+            db = Session()
+            try:
+                db.add(Hint(user_id=i, task_id=i % 50, hint_text="x" * 200, hint_type='analyze'))
+                db.commit()
+            except Exception:
+                with lock:
+                    errors[0] += 1
+            finally:
+                db.close()
+            with lock:
+                write_latencies.append(time.perf_counter() - started_at)
+
+    def reader() -> None:
+        while not done.is_set():
+            db = Session()
+            try:
+                db.query(Hint.was_helpful, func.count(Hint.id)).group_by(Hint.was_helpful).all()
+                with lock:
+                    reads[0] += 1
+            except Exception:
+                with lock:
+                    errors[0] += 1
+            finally:
+                db.close()
+
+    per_writer = writes // writers
+    write_threads = [threading.Thread(target=writer, args=(per_writer,)) for _ in range(writers)]
+    read_threads = [threading.Thread(target=reader) for _ in range(readers)]
+
+    started_at = time.perf_counter()
+    for thread in read_threads + write_threads:
+        thread.start()
+    for thread in write_threads:
+        thread.join()
+    elapsed = time.perf_counter() - started_at
+    done.set()
+    for thread in read_threads:
+        thread.join()
+    engine.dispose()
+
+    return {
+        'profile': profile,
+        'writes_per_sec': len(write_latencies) / elapsed,
+        'reads_per_sec': reads[0] / elapsed,
+        'write_p50_ms': _percentile(write_latencies, 50) * 1000,
+        'write_p95_ms': _percentile(write_latencies, 95) * 1000,
+        'errors': errors[0],
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Сравнение профилей SQLite')
+    parser.add_argument('--writes', type=int, default=2000, help='Общее количество записей')
+    parser.add_argument('--writers', type=int, default=4, help='Пишущих потоков')
+    parser.add_argument('--readers', type=int, default=2, help='Читающих потоков')
+    parser.add_argument('--profiles', nargs='+', default=list(SQLITE_PROFILES),
+                        help='Профили для сравнения')
+    args = parser.parse_args()
+
+    print(f"{'профиль':<10} {'запись/с':>10} {'чтение/с':>10} {'p50 мс':>8} {'p95 мс':>8} {'ошибок':>7}")
+    try:
+        for name in args.profiles:
+            result = run_profile(name, args.writes, args.writers, args.readers)
+            print(
+                f"{result['profile']:<10} {result['writes_per_sec']:>10.0f} {result['reads_per_sec']:>10.0f} "
+                f"{result['write_p50_ms']:>8.2f} {result['write_p95_ms']:>8.2f} {result['errors']:>7}"
+            )
+    finally:
+        shutil.rmtree(_workdir, ignore_errors=True)
@@ -11,7 +11,12 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from client_bot.config import BOT_TOKEN
 from client_bot.handlers import router
 from client_bot.handlers_admin import router as admin_router
-from client_bot.middlewares import AdminCheckMiddleware
+from client_bot.middlewares import AdminCheckMiddleware, RateLimitMiddleware
+from api.api_client import KompegeAPI
+from api.homework_sync import run_sync_loop
+from api.openrouter_client import close_openrouter_client
+from backend.database import engine, async_engine
+from backend.migrations import upgrade
 
 # Настройка логирования
 logging.basicConfig(
@@ -20,6 +25,30 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Фоновые задачи бота
+_background_tasks = []
+
+
+async def on_startup():
+    """Инициализация общих ресурсов при запуске"""
+    # Приводим схему БД к актуальной версии до обработки первых апдейтов
+    applied = upgrade(engine)
+    if applied:
+        logger.info(f"Применены миграции БД: {', '.join(map(str, applied))}")
+    await KompegeAPI.start()
+    _background_tasks.append(asyncio.create_task(run_sync_loop()))
+
+
+async def on_shutdown():
+    """Освобождение общих ресурсов при остановке"""
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    _background_tasks.clear()
+    await KompegeAPI.close()
+    await close_openrouter_client()
+    await async_engine.dispose()
+
 
 async def main():
     """Главная функция запуска бота"""
@@ -30,7 +59,17 @@ async def main():
     )
     dp = Dispatcher()
 
+    # Хуки жизненного цикла
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+
     # Регистрация middleware
+    # Ограничение частоты - внешний middleware: отброшенные события
+    # не доходят ни до фильтров, ни до обработчиков
+    rate_limiter = RateLimitMiddleware()
+    dp.message.outer_middleware(rate_limiter)
+    dp.callback_query.outer_middleware(rate_limiter)
+
     dp.message.middleware(AdminCheckMiddleware())
     dp.callback_query.middleware(AdminCheckMiddleware())
 
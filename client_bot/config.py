@@ -7,10 +7,94 @@ BOT_TOKEN = os.getenv('BOT_TOKEN', '0')
 KOMPEGE_API_URL = 'https://kompege.ru/api/v1/variant/kim/'
 KOMPEGE_HOMEWORK_URL = 'https://kompege.ru/homework?kim='
 
+# Параметры HTTP-клиента kompege.ru
+KOMPEGE_TIMEOUT = float(os.getenv('KOMPEGE_TIMEOUT', '10'))  # секунды на весь запрос
+KOMPEGE_MAX_CONNECTIONS = int(os.getenv('KOMPEGE_MAX_CONNECTIONS', '100'))
+KOMPEGE_CONNECTIONS_PER_HOST = int(os.getenv('KOMPEGE_CONNECTIONS_PER_HOST', '20'))
+KOMPEGE_KEEPALIVE_TIMEOUT = float(os.getenv('KOMPEGE_KEEPALIVE_TIMEOUT', '30'))
+
+# Кэш вариантов kompege.ru в памяти процесса
+KOMPEGE_CACHE_SIZE = int(os.getenv('KOMPEGE_CACHE_SIZE', '256'))  # количество вариантов
+KOMPEGE_CACHE_TTL = float(os.getenv('KOMPEGE_CACHE_TTL', '600'))  # секунды
+
+# Параллельная загрузка описаний для списка домашних работ
+KOMPEGE_LIST_CONCURRENCY = int(os.getenv('KOMPEGE_LIST_CONCURRENCY', '8'))
+KOMPEGE_LIST_DEADLINE = float(os.getenv('KOMPEGE_LIST_DEADLINE', '3'))  # секунды
+
+# Периодическая синхронизация данных домашних работ с kompege.ru
+HOMEWORK_SYNC_INTERVAL = float(os.getenv('HOMEWORK_SYNC_INTERVAL', '1800'))  # секунды
+
 
 # ID администратора (ваш Telegram ID)
 # Чтобы узнать свой ID, напишите боту @userinfobot
 ADMIN_ID = int(os.getenv('ADMIN_ID', '0'))  # Замените на ваш ID
 
+# Параметры HTTP-клиента OpenRouter
+OPENROUTER_CONNECT_TIMEOUT = float(os.getenv('OPENROUTER_CONNECT_TIMEOUT', '5'))  # секунды
+OPENROUTER_READ_TIMEOUT = float(os.getenv('OPENROUTER_READ_TIMEOUT', '30'))  # секунды
+OPENROUTER_MAX_CONNECTIONS = int(os.getenv('OPENROUTER_MAX_CONNECTIONS', '20'))
+
+# Модели OpenRouter: основная и резервная (для hedged-запросов и при сбоях основной)
+OPENROUTER_MODEL = os.getenv('OPENROUTER_MODEL', 'qwen/qwen3-coder')
+OPENROUTER_FALLBACK_MODEL = os.getenv('OPENROUTER_FALLBACK_MODEL', '')
+
+# Circuit breaker для моделей
+CIRCUIT_WINDOW = int(os.getenv('CIRCUIT_WINDOW', '50'))  # последних вызовов в окне
+CIRCUIT_MIN_CALLS = int(os.getenv('CIRCUIT_MIN_CALLS', '10'))
+CIRCUIT_ERROR_THRESHOLD = float(os.getenv('CIRCUIT_ERROR_THRESHOLD', '0.5'))  # доля ошибок
+CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv('CIRCUIT_SLOW_CALL_SECONDS', '20'))
+CIRCUIT_OPEN_SECONDS = float(os.getenv('CIRCUIT_OPEN_SECONDS', '30'))
+
+# Дублирование медленных запросов на резервную модель
+HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', '95'))
+HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', '20'))
+
+# Бюджет токенов на промпт (оценивается локально, длинные части обрезаются)
+LLM_PROMPT_TOKEN_BUDGET = int(os.getenv('LLM_PROMPT_TOKEN_BUDGET', '3000'))
+
+# Цена модели в долларах за 1M токенов (для статистики стоимости)
+LLM_PRICE_PROMPT_PER_1M = float(os.getenv('LLM_PRICE_PROMPT_PER_1M', '0'))
+LLM_PRICE_COMPLETION_PER_1M = float(os.getenv('LLM_PRICE_COMPLETION_PER_1M', '0'))
+
+# Минимальный интервал между редактированиями сообщения при потоковом ответе
+STREAM_EDIT_INTERVAL = float(os.getenv('STREAM_EDIT_INTERVAL', '1.5'))  # секунды
+
+# Максимальное количество одновременных запросов к модели (для всех пользователей)
+LLM_MAX_IN_FLIGHT = int(os.getenv('LLM_MAX_IN_FLIGHT', '8'))
+
+# Ограничение частоты действий пользователя (token bucket):
+# тип действия -> (запас запросов, пополнение запросов в минуту)
+RATE_LIMITS = {
+    'navigation': (
+        int(os.getenv('RATE_NAVIGATION_BURST', '20')),
+        float(os.getenv('RATE_NAVIGATION_PER_MINUTE', '60'))
+    ),
+    'start': (
+        int(os.getenv('RATE_START_BURST', '3')),
+        float(os.getenv('RATE_START_PER_MINUTE', '6'))
+    ),
+    'analyze': (
+        int(os.getenv('RATE_ANALYZE_BURST', '3')),
+        float(os.getenv('RATE_ANALYZE_PER_MINUTE', '4'))
+    ),
+}
+# Через сколько секунд неактивности забывать счётчики пользователя
+RATE_LIMIT_IDLE_TTL = float(os.getenv('RATE_LIMIT_IDLE_TTL', '600'))
+
+# Количество одновременных запросов к модели при прогреве подсказок
+HINT_WARMUP_CONCURRENCY = int(os.getenv('HINT_WARMUP_CONCURRENCY', '4'))
+
+# Кэш подсказок для эквивалентных решений студентов
+ANALYSIS_CACHE_SIZE = int(os.getenv('ANALYSIS_CACHE_SIZE', '5000'))  # количество подсказок
+ANALYSIS_CACHE_TTL = float(os.getenv('ANALYSIS_CACHE_TTL', '86400'))  # секунды
+
+# Песочница для запуска решений на тестах (без bubblewrap решения не запускаются)
+SANDBOX_BWRAP = os.getenv('SANDBOX_BWRAP', 'bwrap')  # путь к bwrap
+SANDBOX_WORKERS = int(os.getenv('SANDBOX_WORKERS', '2'))  # одновременных процессов
+SANDBOX_TIME_LIMIT = float(os.getenv('SANDBOX_TIME_LIMIT', '2'))  # секунды на один запуск
+SANDBOX_MEMORY_LIMIT_MB = int(os.getenv('SANDBOX_MEMORY_LIMIT_MB', '256'))
+SANDBOX_OUTPUT_LIMIT = int(os.getenv('SANDBOX_OUTPUT_LIMIT', '65536'))  # байт вывода
+SANDBOX_MAX_TESTS = int(os.getenv('SANDBOX_MAX_TESTS', '10'))  # тестов на одну проверку
+
 # DashScope API ключ для Qwen LLM
 DASHSCOPE_API_KEY = os.getenv('DASHSCOPE_API_KEY', '')
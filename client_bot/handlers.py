@@ -3,6 +3,7 @@ from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from aiogram.exceptions import TelegramAPIError
 
 import sys
 import os
@@ -19,7 +20,13 @@ from client_bot.keyboards import (
 )
 from api.api_client import KompegeAPI
 from api.openrouter_client import get_openrouter_client
-from backend.crud import SolutionCRUD, HintCRUD, HomeworkCRUD
+from api.llm_scheduler import get_llm_scheduler
+from api.precheck import check_syntax
+from api.sandbox import check_solution, format_verdict
+from backend.crud import SolutionCRUD, HintCRUD, HomeworkCRUD, LLMCallCRUD, TaskTestCRUD
+from client_bot.config import STREAM_EDIT_INTERVAL
+from typing import AsyncIterator
+import asyncio
 import html as html_lib
 
 router = Router()
@@ -63,12 +70,16 @@ async def show_main_menu(callback: CallbackQuery):
 async def show_homework_list(callback: CallbackQuery):
     """Показать список домашних работ"""
     # Получаем активные домашние работы из БД
-    hw_list = HomeworkCRUD.get_active_homeworks()
-    homeworks = []
+    hw_list = await HomeworkCRUD.get_active_homeworks()
 
-    for hw in hw_list:
-        description = hw.title or KompegeAPI.get_description(hw.kim)
-        homeworks.append((hw.kim, description))
+    # Описания ещё не синхронизированных работ загружаем параллельно
+    descriptions = await KompegeAPI.get_descriptions(
+        hw.kim for hw in hw_list if not hw.title and not hw.description
+    )
+    homeworks = [
+        (hw.kim, hw.title or hw.description or descriptions[hw.kim])
+        for hw in hw_list
+    ]
 
     if not homeworks:
         await callback.message.edit_text(
@@ -89,13 +100,20 @@ async def show_homework_detail(callback: CallbackQuery):
     """Показать детали конкретной домашней работы"""
     kim = int(callback.data.split("_")[1])
 
-    description = KompegeAPI.get_description(kim)
-    tasks = KompegeAPI.get_tasks(kim)
+    homework = await HomeworkCRUD.get_homework_by_kim(kim)
+
+    if homework and homework.synced_at:
+        description = homework.description
+        task_count = homework.task_count
+    else:
+        variant = await KompegeAPI.get_variant(kim)
+        description = variant.description if variant else f'Домашняя работа {kim}'
+        task_count = len(variant.tasks) if variant else 0
 
     text = (
-        f"📚 <b>{description}</b>\n\n"
+        f"📚 <b>{html_lib.escape(description or '')}</b>\n\n"
         f"🆔 КИМ: <code>{kim}</code>\n"
-        f"📝 Количество заданий: {len(tasks)}\n\n"
+        f"📝 Количество заданий: {task_count}\n\n"
         f"Выберите действие:"
     )
 
@@ -112,22 +130,20 @@ async def show_tasks_list(callback: CallbackQuery):
     """Показать список заданий для получения подсказок"""
     kim = int(callback.data.split("_")[1])
 
-    tasks = KompegeAPI.get_tasks(kim)
+    variant = await KompegeAPI.get_variant(kim)
 
-    if not tasks:
+    if not variant or not variant.tasks:
         await callback.answer("❌ Не удалось загрузить задания", show_alert=True)
         return
 
-    description = KompegeAPI.get_description(kim)
-
     text = (
-        f"💡 Подсказки для: <b>{description}</b>\n\n"
+        f"💡 Подсказки для: <b>{html_lib.escape(variant.description)}</b>\n\n"
         f"Выберите задание:"
     )
 
     await callback.message.edit_text(
         text,
-        reply_markup=get_tasks_list_keyboard(kim, tasks),
+        reply_markup=get_tasks_list_keyboard(kim, variant.tasks),
         parse_mode="HTML"
     )
     await callback.answer()
@@ -140,8 +156,8 @@ async def show_task_detail(callback: CallbackQuery):
     kim = int(parts[1])
     task_id = int(parts[2])
 
-    tasks = KompegeAPI.get_tasks(kim)
-    task = next((t for t in tasks if t.get('taskId') == task_id), None)
+    variant = await KompegeAPI.get_variant(kim)
+    task = variant.get_task(task_id) if variant else None
 
     if not task:
         await callback.answer("❌ Задание не найдено", show_alert=True)
@@ -168,15 +184,18 @@ async def show_hint_start(callback: CallbackQuery):
     task_id = int(parts[3])
 
     # Получаем задачу
-    tasks = KompegeAPI.get_tasks(kim)
-    task = next((t for t in tasks if t.get('taskId') == task_id), None)
+    variant = await KompegeAPI.get_variant(kim)
+    task = variant.get_task(task_id) if variant else None
 
     if not task:
         await callback.answer("❌ Задача не найдена", show_alert=True)
         return
 
+    # Сохранённая подсказка, которую пользователь сможет оценить
+    hint_id = None
+
     # Проверяем наличие эталонных решений
-    if not SolutionCRUD.count_solutions_by_task(task_id):
+    if not await SolutionCRUD.count_solutions_by_task(task_id):
         hint = (
             "💡 <b>Подсказка для начала:</b>\n\n"
             "1. Внимательно прочитайте условие задачи\n"
@@ -188,28 +207,37 @@ async def show_hint_start(callback: CallbackQuery):
         )
     else:
         # Показываем индикатор загрузки
-        await callback.answer("⏳ Генерирую подсказку...")
+        await callback.answer(
+            "⏳ Генерирую подсказку..." +
+            _queue_note(get_llm_scheduler().position(callback.from_user.id, 'start'))
+        )
 
-        # Получаем текст задачи и очищаем HTML
-        task_text = html_lib.unescape(task.get('text', ''))
+        # Текст задачи (уже очищен от HTML при разборе варианта)
+        task_text = variant.get_task_text(task_id)
 
         # Генерируем подсказку через LLM
         try:
             client = get_openrouter_client()
-            hint_text = client.generate_start_hint(task_id, task_text)
+            trace = {}
+            hint_text = await client.generate_start_hint(
+                task_id, task_text, callback.from_user.id, stats=trace
+            )
 
-            # Сохраняем подсказку в БД
+            # Сохраняем подсказку в БД и связываем с запросом к LLM
             try:
-                HintCRUD.add_hint(
+                saved = await HintCRUD.add_hint(
                     user_id=callback.from_user.id,
                     task_id=task_id,
                     hint_text=hint_text,
                     hint_type='start'
                 )
+                hint_id = saved.id
+                if trace.get('call_id'):
+                    await LLMCallCRUD.attach_hint(trace['call_id'], saved.id)
             except Exception as db_error:
                 print(f"DB Error saving hint: {db_error}")
 
-            hint = f"💡 <b>Подсказка для начала:</b>\n\n{hint_text}"
+            hint = f"💡 <b>Подсказка для начала:</b>\n\n{html_lib.escape(hint_text)}"
         except Exception as e:
             print(f"LLM Error: {e}")
             hint = (
@@ -224,7 +252,7 @@ async def show_hint_start(callback: CallbackQuery):
 
     await callback.message.edit_text(
         hint,
-        reply_markup=get_feedback_keyboard(kim, task_id),
+        reply_markup=get_feedback_keyboard(kim, task_id, hint_id),
         parse_mode="HTML"
     )
     await callback.answer()
@@ -268,17 +296,47 @@ async def process_code_submission(message: Message, state: FSMContext):
     task_id = data.get('task_id')
     code = message.text
 
+    # Файлы, фото и стикеры не содержат text - ждём код дальше
+    if not code:
+        await message.answer("❌ Пришлите код текстом (или /cancel для отмены)")
+        return
+
     # Получаем задачу
-    tasks = KompegeAPI.get_tasks(kim)
-    task = next((t for t in tasks if t.get('taskId') == task_id), None)
+    variant = await KompegeAPI.get_variant(kim)
+    task = variant.get_task(task_id) if variant else None
 
     if not task:
         await message.answer("❌ Задача не найдена")
         await state.clear()
         return
 
+    # Код с синтаксической ошибкой объясняем сразу, без обращения к модели
+    syntax_hint = check_syntax(code)
+    if syntax_hint:
+        hint_id = None
+        try:
+            saved = await HintCRUD.add_hint(
+                user_id=message.from_user.id,
+                task_id=task_id,
+                hint_text=syntax_hint,
+                hint_type='syntax'
+            )
+            hint_id = saved.id
+        except Exception as db_error:
+            print(f"DB Error saving hint: {db_error}")
+
+        await message.answer(
+            "🧩 <b>Ошибка синтаксиса:</b>\n\n"
+            f"{html_lib.escape(syntax_hint)}\n\n"
+            "Исправьте код и отправьте снова!",
+            reply_markup=get_feedback_keyboard(kim, task_id, hint_id),
+            parse_mode="HTML"
+        )
+        await state.clear()
+        return
+
     # Проверяем наличие эталонных решений
-    if not SolutionCRUD.count_solutions_by_task(task_id):
+    if not await SolutionCRUD.count_solutions_by_task(task_id):
         feedback = (
             "✅ <b>Код получен!</b>\n\n"
             f"📊 Длина кода: {len(code)} символов\n\n"
@@ -291,48 +349,89 @@ async def process_code_submission(message: Message, state: FSMContext):
         )
         keyboard = get_task_actions_keyboard(kim, task_id)
     else:
-        # Показываем статус
-        status_msg = await message.answer("⏳ Анализирую ваш код...")
-
-        # Получаем текст задачи и очищаем HTML
-        task_text = html_lib.unescape(task.get('text', ''))
-
-        # Генерируем анализ через LLM
+        # Сначала прогоняем код на тестах: верное решение не требует модели
+        status_msg = await message.answer("⏳ Проверяю код на тестах...")
         try:
-            client = get_openrouter_client()
-            hint = client.analyze_code(task_id, task_text, code)
+            verdict = await check_solution(
+                code,
+                [s.solution for s in await SolutionCRUD.get_solutions_by_task_id(task_id)],
+                [test.input_data for test in await TaskTestCRUD.get_tests_by_task(task_id)]
+            )
+        except Exception as e:
+            print(f"Sandbox Error: {e}")
+            verdict = {'status': 'unavailable'}
+        verdict_text = format_verdict(verdict)
+        prefix = f"{verdict_text}\n" if verdict_text else ""
+
+        if verdict['status'] == 'pass':
+            feedback = f"{verdict_text}\nОтличная работа! Можно переходить к следующему заданию."
+            keyboard = get_task_actions_keyboard(kim, task_id)
+        else:
+            # Показываем результат тестов и статус анализа
+            try:
+                await status_msg.edit_text(
+                    f"{prefix}⏳ Анализирую ваш код..." +
+                    _queue_note(get_llm_scheduler().position(message.from_user.id, 'analyze')),
+                    parse_mode="HTML"
+                )
+            except TelegramAPIError:
+                pass
 
-            # Сохраняем подсказку в БД
+            # Текст задачи (уже очищен от HTML при разборе варианта)
+            task_text = variant.get_task_text(task_id)
+
+            # Генерируем анализ через LLM, показывая текст по мере генерации
+            hint_id = None
             try:
-                HintCRUD.add_hint(
-                    user_id=message.from_user.id,
-                    task_id=task_id,
-                    hint_text=hint,
-                    hint_type='analyze'
+                client = get_openrouter_client()
+                trace = {}
+                hint = await _stream_to_message(
+                    status_msg,
+                    client.analyze_code_stream(
+                        task_id, task_text, code, message.from_user.id, stats=trace,
+                        tests_failed=verdict['status'] != 'unavailable'
+                    ),
+                    header=f"{prefix}🔍 <b>Анализ кода:</b>\n\n"
                 )
-            except Exception as db_error:
-                print(f"DB Error saving hint: {db_error}")
 
-            feedback = (
-                "🔍 <b>Анализ кода:</b>\n\n"
-                f"{hint}\n\n"
-                "Попробуйте исправить код и отправьте снова!"
-            )
-        except Exception as e:
-            print(f"LLM Error: {e}")
-            feedback = (
-                "✅ <b>Код получен!</b>\n\n"
-                "❌ Не удалось проанализировать код. Попробуйте позже.\n\n"
-                "Продолжайте работу над заданием!"
-            )
+                # Сохраняем подсказку в БД и связываем с запросом к LLM
+                try:
+                    saved = await HintCRUD.add_hint(
+                        user_id=message.from_user.id,
+                        task_id=task_id,
+                        hint_text=hint,
+                        hint_type='heuristic' if trace.get('rule') else 'analyze'
+                    )
+                    hint_id = saved.id
+                    if trace.get('call_id'):
+                        await LLMCallCRUD.attach_hint(trace['call_id'], saved.id)
+                except Exception as db_error:
+                    print(f"DB Error saving hint: {db_error}")
+
+                feedback = (
+                    f"{prefix}🔍 <b>Анализ кода:</b>\n\n"
+                    f"{html_lib.escape(hint)}\n\n"
+                    "Попробуйте исправить код и отправьте снова!"
+                )
+            except Exception as e:
+                print(f"LLM Error: {e}")
+                feedback = (prefix or "✅ <b>Код получен!</b>\n\n") + (
+                    "❌ Не удалось проанализировать код. Попробуйте позже.\n\n"
+                    "Продолжайте работу над заданием!"
+                )
 
-        keyboard = get_feedback_keyboard(kim, task_id)
+            keyboard = get_feedback_keyboard(kim, task_id, hint_id)
 
-        # Удаляем статусное сообщение
+        # Заменяем статусное сообщение итоговым ответом
         try:
-            await status_msg.delete()
-        except:
-            pass
+            await status_msg.edit_text(feedback, reply_markup=keyboard, parse_mode="HTML")
+            await state.clear()
+            return
+        except TelegramAPIError:
+            try:
+                await status_msg.delete()
+            except TelegramAPIError:
+                pass
 
     await message.answer(
         feedback,
@@ -343,18 +442,63 @@ async def process_code_submission(message: Message, state: FSMContext):
     await state.clear()
 
 
+def _queue_note(position: int) -> str:
+    """Пояснение о месте в очереди к модели (пусто, если очереди нет)"""
+    if not position:
+        return ""
+    return f"\n👥 Ваше место в очереди: {position}"
+
+
+async def _stream_to_message(status_msg: Message, chunks: AsyncIterator[str], header: str) -> str:
+    """
+    Собрать потоковый ответ модели, обновляя статусное сообщение по мере
+    поступления текста
+
+    Редактирования не чаще STREAM_EDIT_INTERVAL секунд, чтобы не упираться
+    в ограничения Telegram на частоту правок.
+
+    Args:
+        status_msg: Сообщение, которое обновляется по ходу генерации
+        chunks: Фрагменты ответа
+        header: Заголовок перед текстом (HTML)
+
+    Returns:
+        Полный текст ответа
+    """
+    loop = asyncio.get_running_loop()
+    text = ""
+    last_edit = loop.time()
+
+    async for chunk in chunks:
+        text += chunk
+        now = loop.time()
+        if now - last_edit >= STREAM_EDIT_INTERVAL and text.strip():
+            last_edit = now
+            try:
+                await status_msg.edit_text(
+                    f"{header}{html_lib.escape(text)} ▌",
+                    parse_mode="HTML"
+                )
+            except TelegramAPIError:
+                # Пропускаем правку (например, при превышении лимита)
+                pass
+
+    return text.strip()
+
+
 @router.callback_query(F.data.startswith("feedback_yes_"))
 async def process_feedback_yes(callback: CallbackQuery):
     """Обработать положительную обратную связь"""
     parts = callback.data.split("_")
     kim = int(parts[2])
     task_id = int(parts[3])
+    # ID оцениваемой подсказки (нет в кнопках старого формата, 0 - не сохранена)
+    hint_id = int(parts[4]) if len(parts) > 4 else 0
 
     # Сохраняем положительную оценку подсказки
     try:
-        hint = HintCRUD.get_latest_hint_for_user(callback.from_user.id)
-        if hint and hint.task_id == task_id:
-            HintCRUD.mark_helpful(hint.id, was_helpful=True)
+        if hint_id:
+            await HintCRUD.mark_helpful(hint_id, callback.from_user.id, was_helpful=True)
     except Exception as e:
         print(f"DB Error marking hint helpful: {e}")
 
@@ -380,12 +524,13 @@ async def process_feedback_no(callback: CallbackQuery):
     parts = callback.data.split("_")
     kim = int(parts[2])
     task_id = int(parts[3])
+    # ID оцениваемой подсказки (нет в кнопках старого формата, 0 - не сохранена)
+    hint_id = int(parts[4]) if len(parts) > 4 else 0
 
     # Сохраняем отрицательную оценку подсказки
     try:
-        hint = HintCRUD.get_latest_hint_for_user(callback.from_user.id)
-        if hint and hint.task_id == task_id:
-            HintCRUD.mark_helpful(hint.id, was_helpful=False)
+        if hint_id:
+            await HintCRUD.mark_helpful(hint_id, callback.from_user.id, was_helpful=False)
     except Exception as e:
         print(f"DB Error marking hint not helpful: {e}")
 
@@ -3,6 +3,7 @@ from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from aiogram.exceptions import TelegramAPIError
 
 import sys
 import os
@@ -17,14 +18,49 @@ from client_bot.keyboards_admin import (
     get_confirm_delete_keyboard,
     get_homeworks_list_keyboard,
     get_homework_actions_keyboard,
-    get_confirm_hw_delete_keyboard
+    get_confirm_hw_delete_keyboard,
+    get_task_tests_keyboard
+)
+from backend.crud import (
+    SolutionCRUD, HintCRUD, HomeworkCRUD, LLMCallCRUD, TaskTestCRUD, SolutionListItem, SolutionsPage
+)
+from api.homework_sync import sync_homework
+from api.api_client import KompegeAPI
+from api.openrouter_client import get_openrouter_client
+from api.hint_warmup import warm_homework_hints, format_warmup_report
+from client_bot.config import (
+    ADMIN_ID,
+    STREAM_EDIT_INTERVAL,
+    LLM_PRICE_PROMPT_PER_1M,
+    LLM_PRICE_COMPLETION_PER_1M
 )
-from backend.crud import SolutionCRUD, HintCRUD, HomeworkCRUD
-from client_bot.config import ADMIN_ID
 from datetime import datetime
+import asyncio
+import html
 
 router = Router()
 
+# Подписи типов подсказок (эмодзи, название)
+HINT_TYPE_LABELS = {
+    'start': ("🎯", "Начало"),
+    'analyze': ("🔍", "Анализ"),
+    'syntax': ("🧩", "Синтаксис"),
+    'heuristic': ("⚡", "Шаблон"),
+}
+
+# Сколько задач показывать в статистике подсказок
+HINT_STATS_TOP_TASKS = 5
+
+# Состояния circuit breaker'а моделей
+BREAKER_STATE_LABELS = {
+    'closed': "🟢",
+    'half_open': "🟡",
+    'open': "🔴",
+}
+
+# Фоновые задачи прогрева подсказок
+_warmup_tasks = set()
+
 
 class AddSolutionStates(StatesGroup):
     """Состояния для добавления решения"""
@@ -38,6 +74,12 @@ class SearchSolutionStates(StatesGroup):
     waiting_for_task_id = State()
 
 
+class TaskTestStates(StatesGroup):
+    """Состояния для управления тестами задачи"""
+    waiting_for_task_id = State()
+    waiting_for_input = State()
+
+
 @router.message(Command("admin"))
 @admin_only
 async def cmd_admin(message: Message, **kwargs):
@@ -134,7 +176,7 @@ async def process_comment(message: Message, state: FSMContext, **kwargs):
     solution = data['solution']
 
     # Сохранение в БД
-    result = SolutionCRUD.add_solution(task_id, solution, comment)
+    result = await SolutionCRUD.add_solution(task_id, solution, comment)
 
     await state.clear()
 
@@ -172,9 +214,9 @@ async def cancel_admin_action(callback: CallbackQuery, state: FSMContext, **kwar
 @admin_only
 async def list_all_solutions(callback: CallbackQuery, **kwargs):
     """Показать все решения"""
-    solutions = SolutionCRUD.get_all_solutions()
+    total = await SolutionCRUD.count_all_solutions()
 
-    if not solutions:
+    if not total:
         await callback.message.edit_text(
             "📋 <b>Список решений</b>\n\n"
             "❌ В базе нет решений",
@@ -184,11 +226,13 @@ async def list_all_solutions(callback: CallbackQuery, **kwargs):
         await callback.answer()
         return
 
+    page = await SolutionCRUD.get_solutions_page()
+
     await callback.message.edit_text(
         f"📋 <b>Список решений</b>\n\n"
-        f"Всего: {len(solutions)}\n\n"
+        f"Всего: {total}\n\n"
         f"Выберите решение:",
-        reply_markup=get_admin_solutions_list_keyboard(solutions),
+        reply_markup=get_admin_solutions_list_keyboard(page),
         parse_mode="HTML"
     )
     await callback.answer()
@@ -198,15 +242,33 @@ async def list_all_solutions(callback: CallbackQuery, **kwargs):
 @admin_only
 async def navigate_solutions_list(callback: CallbackQuery, **kwargs):
     """Навигация по страницам списка решений"""
-    page = int(callback.data.split("_")[-1])
-    solutions = SolutionCRUD.get_all_solutions()
+    # admin_list_page_{номер}_{after|before}_{граничный ID}; у кнопок из
+    # сообщений до перехода на курсоры формат admin_list_page_{номер}
+    try:
+        page_number, direction, cursor = callback.data[len("admin_list_page_"):].split("_")
+        page_number, cursor = int(page_number), int(cursor)
+    except ValueError:
+        page_number, direction, cursor = 0, None, None
+
+    if direction == "before":
+        page = await SolutionCRUD.get_solutions_page(before_id=cursor)
+        if not page.has_prev:
+            page_number = 0
+    elif direction == "after":
+        page = await SolutionCRUD.get_solutions_page(after_id=cursor)
+        if page.items and page.items[-1].id <= cursor:
+            # Следующая страница пуста - остались на последней
+            page_number = max(page_number - 1, 0)
+    else:
+        page = await SolutionCRUD.get_solutions_page()
+    total = await SolutionCRUD.count_all_solutions()
 
     await callback.message.edit_text(
         f"📋 <b>Список решений</b>\n\n"
-        f"Всего: {len(solutions)}\n"
-        f"Страница: {page + 1}\n\n"
+        f"Всего: {total}\n"
+        f"Страница: {page_number + 1}\n\n"
         f"Выберите решение:",
-        reply_markup=get_admin_solutions_list_keyboard(solutions, page),
+        reply_markup=get_admin_solutions_list_keyboard(page, page_number),
         parse_mode="HTML"
     )
     await callback.answer()
@@ -217,7 +279,7 @@ async def navigate_solutions_list(callback: CallbackQuery, **kwargs):
 async def view_solution_admin(callback: CallbackQuery, **kwargs):
     """Просмотр решения с действиями администратора"""
     solution_id = int(callback.data.split("_")[-1])
-    solution = SolutionCRUD.get_solution_by_id(solution_id)
+    solution = await SolutionCRUD.get_solution_by_id(solution_id)
 
     if not solution:
         await callback.answer("❌ Решение не найдено", show_alert=True)
@@ -251,7 +313,7 @@ async def view_solution_admin(callback: CallbackQuery, **kwargs):
 async def confirm_delete_solution(callback: CallbackQuery, **kwargs):
     """Подтверждение удаления решения"""
     solution_id = int(callback.data.split("_")[-1])
-    solution = SolutionCRUD.get_solution_by_id(solution_id)
+    solution = await SolutionCRUD.get_solution_by_id(solution_id)
 
     if not solution:
         await callback.answer("❌ Решение не найдено", show_alert=True)
@@ -281,7 +343,7 @@ async def delete_solution(callback: CallbackQuery, **kwargs):
     """Удалить решение"""
     solution_id = int(callback.data.split("_")[-1])
 
-    if SolutionCRUD.delete_solution(solution_id):
+    if await SolutionCRUD.delete_solution(solution_id):
         await callback.message.edit_text(
             "✅ <b>Решение удалено</b>",
             reply_markup=get_admin_menu_keyboard(),
@@ -313,7 +375,7 @@ async def process_search_task_id(message: Message, state: FSMContext, **kwargs):
     """Обработать поиск по Task ID"""
     try:
         task_id = int(message.text.strip())
-        solutions = SolutionCRUD.get_solutions_by_task_id(task_id)
+        solutions = await SolutionCRUD.get_solutions_by_task_id(task_id)
 
         await state.clear()
 
@@ -337,7 +399,11 @@ async def process_search_task_id(message: Message, state: FSMContext, **kwargs):
 
         await message.answer(
             text,
-            reply_markup=get_admin_solutions_list_keyboard(solutions),
+            reply_markup=get_admin_solutions_list_keyboard(SolutionsPage(
+                [SolutionListItem.from_comment(sol.id, sol.task_id, sol.comment) for sol in solutions[:5]],
+                has_prev=False,
+                has_next=False
+            )),
             parse_mode="HTML"
         )
 
@@ -347,66 +413,168 @@ async def process_search_task_id(message: Message, state: FSMContext, **kwargs):
             reply_markup=get_cancel_keyboard()
         )
 
-@router.callback_query(F.data == "admin_view_hints")
+def _format_task_tests(task_id: int, tests: list) -> str:
+    """Текст списка тестов задачи"""
+    text = (
+        f"🧪 <b>Тесты задачи</b> <code>{task_id}</code>\n\n"
+        f"Тестов: {len(tests)}\n"
+    )
+    if not tests:
+        text += "Решения проверяются одним запуском без входных данных.\n"
+    text += "\nНажмите на тест, чтобы удалить его."
+    return text
+
+
+@router.callback_query(F.data == "admin_tests")
 @admin_only
-async def view_user_hints(callback: CallbackQuery, **kwargs):
-    """Просмотр последних подсказок пользователей"""
-    # Получаем последние 10 подсказок из БД
+async def start_task_tests(callback: CallbackQuery, state: FSMContext, **kwargs):
+    """Начать работу с тестами задачи"""
+    await state.set_state(TaskTestStates.waiting_for_task_id)
+
+    await callback.message.edit_text(
+        "🧪 <b>Тесты задач</b>\n\n"
+        "Входные данные, на которых код студента сравнивается с эталонным решением.\n\n"
+        "Введите Task ID задачи:",
+        reply_markup=get_cancel_keyboard(),
+        parse_mode="HTML"
+    )
+    await callback.answer()
+
+
+@router.message(TaskTestStates.waiting_for_task_id)
+@admin_only
+async def process_tests_task_id(message: Message, state: FSMContext, **kwargs):
+    """Показать тесты задачи по Task ID"""
     try:
-        # Получаем все подсказки и группируем по пользователям
-        from backend.database import get_db, Hint
-        db = get_db()
+        task_id = int(message.text.strip())
+    except ValueError:
+        await message.answer(
+            "❌ Неверный формат. Введите числовой Task ID:",
+            reply_markup=get_cancel_keyboard()
+        )
+        return
 
-        try:
-            # Получаем последние 10 подсказок
-            hints = db.query(Hint).order_by(Hint.created_at.desc()).limit(10).all()
-
-            if not hints:
-                await callback.message.edit_text(
-                    "📊 <b>Подсказки пользователей</b>\n\n"
-                    "Пока нет ни одной подсказки.",
-                    reply_markup=get_admin_menu_keyboard(),
-                    parse_mode="HTML"
-                )
-                await callback.answer()
-                return
+    await state.clear()
+    tests = await TaskTestCRUD.get_tests_by_task(task_id)
+    await message.answer(
+        _format_task_tests(task_id, tests),
+        reply_markup=get_task_tests_keyboard(task_id, tests),
+        parse_mode="HTML"
+    )
 
-            text = "💡 <b>Последние 10 подсказок:</b>\n\n"
 
-            for idx, hint in enumerate(hints, 1):
-                # Форматируем дату
-                date_str = hint.created_at.strftime("%d.%m %H:%M")
+@router.callback_query(F.data.startswith("admin_test_add_"))
+@admin_only
+async def start_add_task_test(callback: CallbackQuery, state: FSMContext, **kwargs):
+    """Начать добавление теста"""
+    task_id = int(callback.data.split("_")[-1])
+    await state.set_state(TaskTestStates.waiting_for_input)
+    await state.update_data(task_id=task_id)
 
-                # Тип подсказки
-                hint_type_emoji = "🎯" if hint.hint_type == "start" else "🔍"
-                hint_type_text = "Начало" if hint.hint_type == "start" else "Анализ"
+    await callback.message.edit_text(
+        f"➕ <b>Новый тест для задачи</b> <code>{task_id}</code>\n\n"
+        "Отправьте входные данные (то, что программа прочитает из stdin):",
+        reply_markup=get_cancel_keyboard(),
+        parse_mode="HTML"
+    )
+    await callback.answer()
 
-                # Оценка
-                if hint.was_helpful is None:
-                    helpful_emoji = "⏳"
-                elif hint.was_helpful:
-                    helpful_emoji = "✅"
-                else:
-                    helpful_emoji = "❌"
 
-                # Текст подсказки (первые 50 символов)
-                hint_preview = hint.hint_text[:50] + "..." if len(hint.hint_text) > 50 else hint.hint_text
+@router.message(TaskTestStates.waiting_for_input)
+@admin_only
+async def process_task_test_input(message: Message, state: FSMContext, **kwargs):
+    """Сохранить входные данные теста"""
+    # Файлы и фото не содержат text - ждём входные данные дальше
+    if message.text is None:
+        await message.answer(
+            "❌ Пришлите входные данные текстом",
+            reply_markup=get_cancel_keyboard()
+        )
+        return
 
-                text += (
-                    f"{idx}. {hint_type_emoji} <b>{hint_type_text}</b> | Task {hint.task_id}\n"
-                    f"   👤 User ID: <code>{hint.user_id}</code>\n"
-                    f"   📅 {date_str} | {helpful_emoji}\n"
-                    f"   💬 {hint_preview}\n\n"
-                )
+    data = await state.get_data()
+    task_id = data.get('task_id')
+    await state.clear()
 
+    await TaskTestCRUD.add_test(task_id, message.text)
+    tests = await TaskTestCRUD.get_tests_by_task(task_id)
+    await message.answer(
+        "✅ Тест добавлен\n\n" + _format_task_tests(task_id, tests),
+        reply_markup=get_task_tests_keyboard(task_id, tests),
+        parse_mode="HTML"
+    )
+
+
+@router.callback_query(F.data.startswith("admin_test_del_"))
+@admin_only
+async def delete_task_test(callback: CallbackQuery, **kwargs):
+    """Удалить тест"""
+    test_id = int(callback.data.split("_")[-1])
+    test = await TaskTestCRUD.get_test_by_id(test_id)
+
+    if not test or not await TaskTestCRUD.delete_test(test_id):
+        await callback.answer("❌ Тест не найден", show_alert=True)
+        return
+
+    tests = await TaskTestCRUD.get_tests_by_task(test.task_id)
+    await callback.message.edit_text(
+        _format_task_tests(test.task_id, tests),
+        reply_markup=get_task_tests_keyboard(test.task_id, tests),
+        parse_mode="HTML"
+    )
+    await callback.answer("✅ Тест удалён")
+
+
+@router.callback_query(F.data == "admin_view_hints")
+@admin_only
+async def view_user_hints(callback: CallbackQuery, **kwargs):
+    """Просмотр последних подсказок пользователей"""
+    # Получаем последние 10 подсказок из БД
+    try:
+        hints = await HintCRUD.get_recent_hints(limit=10)
+
+        if not hints:
             await callback.message.edit_text(
-                text,
+                "📊 <b>Подсказки пользователей</b>\n\n"
+                "Пока нет ни одной подсказки.",
                 reply_markup=get_admin_menu_keyboard(),
                 parse_mode="HTML"
             )
-        finally:
-            db.close()
+            await callback.answer()
+            return
+
+        text = "💡 <b>Последние 10 подсказок:</b>\n\n"
+
+        for idx, hint in enumerate(hints, 1):
+            # Форматируем дату
+            date_str = hint.created_at.strftime("%d.%m %H:%M")
+
+            # Тип подсказки
+            hint_type_emoji, hint_type_text = HINT_TYPE_LABELS.get(hint.hint_type, ("🔍", "Анализ"))
+
+            # Оценка
+            if hint.was_helpful is None:
+                helpful_emoji = "⏳"
+            elif hint.was_helpful:
+                helpful_emoji = "✅"
+            else:
+                helpful_emoji = "❌"
+
+            # Текст подсказки (первые 50 символов)
+            hint_preview = hint.hint_text[:50] + "..." if len(hint.hint_text) > 50 else hint.hint_text
+
+            text += (
+                f"{idx}. {hint_type_emoji} <b>{hint_type_text}</b> | Task {hint.task_id}\n"
+                f"   👤 User ID: <code>{hint.user_id}</code>\n"
+                f"   📅 {date_str} | {helpful_emoji}\n"
+                f"   💬 {hint_preview}\n\n"
+            )
 
+        await callback.message.edit_text(
+            text,
+            reply_markup=get_admin_menu_keyboard(),
+            parse_mode="HTML"
+        )
     except Exception as e:
         print(f"Error viewing hints: {e}")
         await callback.message.edit_text(
@@ -424,7 +592,7 @@ async def view_hint_stats(callback: CallbackQuery, **kwargs):
     """Просмотр статистики по подсказкам"""
     try:
         # Получаем статистику за последние 7 дней
-        stats = HintCRUD.get_hint_stats(days=7)
+        stats = await HintCRUD.get_hint_stats(days=7)
 
         # Вычисляем процент полезных подсказок
         if stats['helpful'] + stats['not_helpful'] > 0:
@@ -445,6 +613,70 @@ async def view_hint_stats(callback: CallbackQuery, **kwargs):
             f"📈 Процент полезных: <b>{helpful_percent}%</b>"
         )
 
+        # Разбивка по типам подсказок
+        if stats['by_type']:
+            text += "\n\n🗂 <b>По типам</b>"
+            for hint_type, item in sorted(stats['by_type'].items(), key=lambda kv: -kv[1]['total']):
+                emoji, label = HINT_TYPE_LABELS.get(hint_type, ("🔍", hint_type))
+                text += f"\n{emoji} {label}: {item['total']} (✅ {item['helpful']} / ❌ {item['not_helpful']})"
+
+        # Задачи, по которым чаще всего просят подсказки
+        if stats['by_task']:
+            text += "\n\n🔥 <b>Чаще всего</b>"
+            top_tasks = sorted(stats['by_task'].items(), key=lambda kv: -kv[1]['total'])[:HINT_STATS_TOP_TASKS]
+            for task_id, item in top_tasks:
+                text += f"\nTask {task_id}: {item['total']} (✅ {item['helpful']} / ❌ {item['not_helpful']})"
+
+        # Расход токенов и задержки запросов к LLM
+        call_stats = await LLMCallCRUD.get_call_stats(
+            days=7,
+            price_prompt=LLM_PRICE_PROMPT_PER_1M,
+            price_completion=LLM_PRICE_COMPLETION_PER_1M
+        )
+        # Доля анализов, закрытых шаблонными подсказками (с запуска бота)
+        client = get_openrouter_client()
+        structural = client.structural_hint_stats()
+        if structural['checks']:
+            text += (
+                f"\n\n⚡ Шаблонные подсказки: <b>{structural['hits']}</b> из {structural['checks']} "
+                f"({round(structural['hit_rate'] * 100, 1)}%)"
+            )
+            for rule, hits in structural['rules'].items():
+                text += f"\n   {rule}: {hits}"
+
+        if call_stats:
+            text += "\n\n🤖 <b>Запросы к LLM</b>\n"
+            for hint_type, item in sorted(call_stats.items()):
+                p50 = f"{item['p50_ms']} мс" if item['p50_ms'] is not None else "—"
+                p95 = f"{item['p95_ms']} мс" if item['p95_ms'] is not None else "—"
+                text += (
+                    f"\n<b>{hint_type}</b>: {item['calls']} запр. (ошибок: {item['errors']})\n"
+                    f"   Токены: {item['prompt_tokens']} + {item['completion_tokens']}, "
+                    f"${item['cost']:.4f}\n"
+                    f"   Задержка p50/p95: {p50} / {p95}\n"
+                )
+
+        # Состояние моделей по circuit breaker'ам (скользящее окно вызовов)
+        breakers = client.breaker_stats()
+        if breakers:
+            text += "\n\n🛡 <b>Модели</b>"
+            for item in breakers:
+                p95 = f"{round(item['p95'] * 1000)} мс" if item['p95'] is not None else "—"
+                text += (
+                    f"\n{BREAKER_STATE_LABELS.get(item['state'], item['state'])} "
+                    f"{html.escape(item['name'])}: {item['calls']} запр., "
+                    f"ошибок {round(item['error_rate'] * 100, 1)}%, p95 {p95}"
+                )
+
+        # Кэши в памяти (с запуска бота)
+        text += "\n\n🗄 <b>Кэши</b>"
+        for label, cache in (("Варианты kompege.ru", KompegeAPI.cache_stats()),
+                             ("Анализы кода", client.analysis_cache_stats())):
+            text += (
+                f"\n{label}: {cache['size']}/{cache['maxsize']}, "
+                f"попаданий {cache['hits']} из {cache['hits'] + cache['misses']} ({cache['hit_rate']}%)"
+            )
+
         await callback.message.edit_text(
             text,
             reply_markup=get_admin_menu_keyboard(),
@@ -467,11 +699,53 @@ class AddHomeworkStates(StatesGroup):
     waiting_for_title = State()
 
 
+def _start_hint_warmup(message: Message, kim: int) -> None:
+    """Запустить в фоне прогрев подсказок "Как начать?" для варианта"""
+    task = asyncio.create_task(_run_hint_warmup(message, kim))
+    _warmup_tasks.add(task)
+    task.add_done_callback(_warmup_tasks.discard)
+
+
+async def _run_hint_warmup(message: Message, kim: int) -> None:
+    """Прогреть подсказки варианта, сообщая администратору о прогрессе"""
+    progress_msg = await message.answer(f"🔥 Готовлю подсказки для KIM {kim}...")
+    loop = asyncio.get_running_loop()
+    last_edit = loop.time()
+
+    async def on_progress(report: dict) -> None:
+        nonlocal last_edit
+        now = loop.time()
+        if now - last_edit < STREAM_EDIT_INTERVAL:
+            return
+        last_edit = now
+        try:
+            await progress_msg.edit_text(f"🔥 Готовлю подсказки...\n\n{format_warmup_report(report)}")
+        except TelegramAPIError:
+            pass
+
+    try:
+        report = await warm_homework_hints(kim, on_progress=on_progress)
+        await progress_msg.edit_text(f"✅ Подсказки подготовлены\n\n{format_warmup_report(report)}")
+    except Exception as e:
+        print(f"Error warming hints for KIM {kim}: {e}")
+        await progress_msg.edit_text(f"❌ Ошибка при подготовке подсказок для KIM {kim}")
+
+
+def _format_homework_catalog(homework) -> str:
+    """Строки с сохранёнными данными варианта для сообщений администратору"""
+    if not homework.synced_at:
+        return "⚠️ Не удалось загрузить данные варианта с kompege.ru\n"
+    return (
+        f"Описание: {html.escape(homework.description or '')}\n"
+        f"Заданий: {homework.task_count}\n"
+    )
+
+
 @router.callback_query(F.data == "admin_manage_homeworks")
 @admin_only
 async def manage_homeworks(callback: CallbackQuery, **kwargs):
     """Управление домашними работами"""
-    homeworks = HomeworkCRUD.get_all_homeworks()
+    homeworks = await HomeworkCRUD.get_all_homeworks()
 
     if not homeworks:
         text = "📚 <b>Управление домашними работами</b>\n\nСписок пуст."
@@ -492,7 +766,7 @@ async def manage_homeworks(callback: CallbackQuery, **kwargs):
 async def view_homework(callback: CallbackQuery, **kwargs):
     """Просмотр домашней работы"""
     kim = int(callback.data.split("_")[-1])
-    homework = HomeworkCRUD.get_homework_by_kim(kim)
+    homework = await HomeworkCRUD.get_homework_by_kim(kim)
 
     if not homework:
         await callback.answer("❌ Домашняя работа не найдена", show_alert=True)
@@ -522,7 +796,7 @@ async def view_homework(callback: CallbackQuery, **kwargs):
 async def toggle_homework(callback: CallbackQuery, **kwargs):
     """Переключить статус домашней работы"""
     kim = int(callback.data.split("_")[-1])
-    homework = HomeworkCRUD.toggle_homework_status(kim)
+    homework = await HomeworkCRUD.toggle_homework_status(kim)
 
     if not homework:
         await callback.answer("❌ Ошибка", show_alert=True)
@@ -534,13 +808,17 @@ async def toggle_homework(callback: CallbackQuery, **kwargs):
     # Обновляем сообщение
     await view_homework(callback)
 
+    # При открытии доступа заранее готовим подсказки
+    if homework.is_active:
+        _start_hint_warmup(callback.message, kim)
+
 
 @router.callback_query(F.data.startswith("admin_hw_delete_"))
 @admin_only
 async def delete_homework_confirm(callback: CallbackQuery, **kwargs):
     """Подтверждение удаления домашней работы"""
     kim = int(callback.data.split("_")[-1])
-    homework = HomeworkCRUD.get_homework_by_kim(kim)
+    homework = await HomeworkCRUD.get_homework_by_kim(kim)
 
     if not homework:
         await callback.answer("❌ Домашняя работа не найдена", show_alert=True)
@@ -568,7 +846,7 @@ async def delete_homework(callback: CallbackQuery, **kwargs):
     """Удалить домашнюю работу"""
     kim = int(callback.data.split("_")[-1])
 
-    if HomeworkCRUD.delete_homework(kim):
+    if await HomeworkCRUD.delete_homework(kim):
         await callback.answer("✅ Домашняя работа удалена", show_alert=True)
         await manage_homeworks(callback)
     else:
@@ -597,7 +875,7 @@ async def add_homework_kim(message: Message, state: FSMContext):
         kim = int(message.text)
 
         # Проверяем, не существует ли уже
-        if HomeworkCRUD.get_homework_by_kim(kim):
+        if await HomeworkCRUD.get_homework_by_kim(kim):
             await message.answer(
                 "❌ Домашняя работа с таким KIM уже существует!",
                 reply_markup=get_cancel_keyboard()
@@ -625,18 +903,21 @@ async def add_homework_skip_title(message: Message, state: FSMContext):
     data = await state.get_data()
     kim = data.get('kim')
 
-    # Создаем домашнюю работу без названия
-    homework = HomeworkCRUD.add_homework(kim=kim, is_active=True)
+    # Создаем домашнюю работу без названия и сохраняем данные варианта
+    homework = await HomeworkCRUD.add_homework(kim=kim, is_active=True)
+    homework = await sync_homework(kim) or homework
 
     await state.clear()
 
     await message.answer(
         f"✅ Домашняя работа добавлена!\n\n"
         f"KIM: {homework.kim}\n"
+        f"{_format_homework_catalog(homework)}"
         f"Статус: ✅ Активна",
         reply_markup=get_admin_menu_keyboard(),
         parse_mode="HTML"
     )
+    _start_hint_warmup(message, kim)
 
 
 @router.message(AddHomeworkStates.waiting_for_title)
@@ -646,8 +927,9 @@ async def add_homework_title(message: Message, state: FSMContext):
     kim = data.get('kim')
     title = message.text
 
-    # Создаем домашнюю работу
-    homework = HomeworkCRUD.add_homework(kim=kim, title=title, is_active=True)
+    # Создаем домашнюю работу и сохраняем данные варианта
+    homework = await HomeworkCRUD.add_homework(kim=kim, title=title, is_active=True)
+    homework = await sync_homework(kim) or homework
 
     await state.clear()
 
@@ -655,10 +937,12 @@ async def add_homework_title(message: Message, state: FSMContext):
         f"✅ Домашняя работа добавлена!\n\n"
         f"Название: {homework.title}\n"
         f"KIM: {homework.kim}\n"
+        f"{_format_homework_catalog(homework)}"
         f"Статус: ✅ Активна",
         reply_markup=get_admin_menu_keyboard(),
         parse_mode="HTML"
     )
+    _start_hint_warmup(message, kim)
 
 
 @router.callback_query(F.data == "admin_cancel", AddHomeworkStates)
@@ -1,6 +1,6 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 
 def get_main_menu_keyboard() -> InlineKeyboardMarkup:
@@ -134,23 +134,25 @@ def get_back_to_task_keyboard(kim: int, task_id: int) -> InlineKeyboardMarkup:
     return keyboard.as_markup()
 
 
-def get_feedback_keyboard(kim: int, task_id: int) -> InlineKeyboardMarkup:
+def get_feedback_keyboard(kim: int, task_id: int, hint_id: Optional[int] = None) -> InlineKeyboardMarkup:
     """
     Клавиатура для обратной связи по подсказке
 
     Args:
         kim: ID варианта
         task_id: ID задания
+        hint_id: ID сохранённой подсказки, которую оценивает пользователь
+                 (0 в callback - подсказка не сохранена, оценка не записывается)
     """
     keyboard = InlineKeyboardBuilder()
 
     keyboard.button(
         text="✅ Помогла",
-        callback_data=f"feedback_yes_{kim}_{task_id}"
+        callback_data=f"feedback_yes_{kim}_{task_id}_{hint_id or 0}"
     )
     keyboard.button(
         text="❌ Не помогла",
-        callback_data=f"feedback_no_{kim}_{task_id}"
+        callback_data=f"feedback_no_{kim}_{task_id}_{hint_id or 0}"
     )
     keyboard.button(
         text="◀️ Назад к заданию",
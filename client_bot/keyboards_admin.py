@@ -1,7 +1,8 @@
 from aiogram.types import InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from typing import List
-from backend.database import Solution
+from backend.crud import SolutionsPage
+from backend.database import TaskTest
 
 
 def get_admin_menu_keyboard() -> InlineKeyboardMarkup:
@@ -32,6 +33,10 @@ def get_admin_menu_keyboard() -> InlineKeyboardMarkup:
         text="📚 Управление домашними работами",
         callback_data="admin_manage_homeworks"
     )
+    keyboard.button(
+        text="🧪 Тесты задач",
+        callback_data="admin_tests"
+    )
     keyboard.button(
         text="◀️ Вернуться в бот",
         callback_data="main_menu"
@@ -62,42 +67,34 @@ def get_admin_solution_actions_keyboard(solution_id: int) -> InlineKeyboardMarku
     return keyboard.as_markup()
 
 
-def get_admin_solutions_list_keyboard(solutions: List[Solution], page: int = 0, per_page: int = 5) -> InlineKeyboardMarkup:
+def get_admin_solutions_list_keyboard(page: SolutionsPage, page_number: int = 0) -> InlineKeyboardMarkup:
     """
     Клавиатура со списком решений для администратора
 
     Args:
-        solutions: Список решений
-        page: Номер страницы
-        per_page: Количество элементов на странице
+        page: Страница решений
+        page_number: Номер страницы (с нуля)
     """
     keyboard = InlineKeyboardBuilder()
 
-    start_idx = page * per_page
-    end_idx = start_idx + per_page
-    page_solutions = solutions[start_idx:end_idx]
-
-    for sol in page_solutions:
-        task_id = sol.task_id
-        comment_preview = sol.comment[:20] + "..." if sol.comment and len(sol.comment) > 20 else sol.comment or "Без комментария"
-
+    for sol in page.items:
         keyboard.button(
-            text=f"Task {task_id} | {comment_preview}",
+            text=f"Task {sol.task_id} | {sol.comment_preview or 'Без комментария'}",
             callback_data=f"admin_view_solution_{sol.id}"
         )
 
-    # Навигация по страницам
+    # Навигация по страницам: в callback передаётся граничный ID страницы
     nav_buttons = []
-    if page > 0:
+    if page.has_prev and page.items:
         nav_buttons.append({
             "text": "⬅️ Назад",
-            "callback_data": f"admin_list_page_{page - 1}"
+            "callback_data": f"admin_list_page_{page_number - 1}_before_{page.items[0].id}"
         })
 
-    if end_idx < len(solutions):
+    if page.has_next and page.items:
         nav_buttons.append({
             "text": "Вперед ➡️",
-            "callback_data": f"admin_list_page_{page + 1}"
+            "callback_data": f"admin_list_page_{page_number + 1}_after_{page.items[-1].id}"
         })
 
     for btn in nav_buttons:
@@ -210,3 +207,27 @@ def get_confirm_hw_delete_keyboard(kim: int) -> InlineKeyboardMarkup:
 
     keyboard.adjust(1)
     return keyboard.as_markup()
+
+
+def get_task_tests_keyboard(task_id: int, tests: List[TaskTest]) -> InlineKeyboardMarkup:
+    """Клавиатура тестов задачи (кнопка теста удаляет его)"""
+    keyboard = InlineKeyboardBuilder()
+
+    for idx, test in enumerate(tests, 1):
+        preview = " ".join(test.input_data.split())[:25] or "пустой ввод"
+        keyboard.button(
+            text=f"🗑️ #{idx}: {preview}",
+            callback_data=f"admin_test_del_{test.id}"
+        )
+
+    keyboard.button(
+        text="➕ Добавить тест",
+        callback_data=f"admin_test_add_{task_id}"
+    )
+    keyboard.button(
+        text="◀️ В админ-меню",
+        callback_data="admin_menu"
+    )
+
+    keyboard.adjust(1)
+    return keyboard.as_markup()
@@ -1,7 +1,8 @@
-from typing import Callable, Dict, Any, Awaitable
+import time
+from typing import Callable, Dict, Any, Awaitable, Tuple
 from aiogram import BaseMiddleware
 from aiogram.types import Message, CallbackQuery
-from client_bot.config import ADMIN_ID
+from client_bot.config import ADMIN_ID, RATE_LIMITS, RATE_LIMIT_IDLE_TTL
 
 
 class AdminCheckMiddleware(BaseMiddleware):
@@ -20,6 +21,144 @@ class AdminCheckMiddleware(BaseMiddleware):
         return await handler(event, data)
 
 
+class TokenBucket:
+    """Корзина токенов: запас запросов, пополняемый с постоянной скоростью"""
+
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated_at', 'notified_until')
+
+    def __init__(self, capacity: int, per_minute: float, now: float):
+        """
+        Инициализация корзины
+
+        Args:
+            capacity: Максимальный запас запросов
+            per_minute: Скорость пополнения (запросов в минуту)
+            now: Текущее время (time.monotonic)
+        """
+        self.capacity = capacity
+        self.rate = per_minute / 60
+        self.tokens = float(capacity)
+        self.updated_at = now
+        self.notified_until = 0.0
+
+    def consume(self, now: float) -> float:
+        """
+        Потратить один токен
+
+        Args:
+            now: Текущее время (time.monotonic)
+
+        Returns:
+            0 если запрос разрешён, иначе сколько секунд ждать до следующего токена
+        """
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        if self.rate <= 0:
+            return float('inf')
+        return (1 - self.tokens) / self.rate
+
+    def is_idle(self, now: float, idle_ttl: float) -> bool:
+        """Корзина давно не использовалась (и её можно забыть)"""
+        return now - self.updated_at > idle_ttl
+
+
+class RateLimitMiddleware(BaseMiddleware):
+    """Middleware ограничения частоты действий пользователя
+
+    Для каждой пары (пользователь, тип действия) хранится корзина токенов.
+    Если токенов нет, событие не передаётся обработчикам, а пользователь
+    получает сообщение о паузе (не чаще одного раза за паузу).
+    """
+
+    # Как часто удалять неиспользуемые корзины (секунды)
+    SWEEP_INTERVAL = 60
+
+    def __init__(self, limits: Dict[str, Tuple[int, float]] = RATE_LIMITS,
+                 idle_ttl: float = RATE_LIMIT_IDLE_TTL):
+        """
+        Инициализация middleware
+
+        Args:
+            limits: Тип действия -> (запас запросов, пополнение в минуту)
+            idle_ttl: Через сколько секунд неактивности удалять корзину
+        """
+        self.limits = limits
+        self.idle_ttl = idle_ttl
+        self._buckets: Dict[Tuple[int, str], TokenBucket] = {}
+        self._last_sweep = time.monotonic()
+
+    async def __call__(
+        self,
+        handler: Callable[[Message | CallbackQuery, Dict[str, Any]], Awaitable[Any]],
+        event: Message | CallbackQuery,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = event.from_user
+        if user is None or user.id == ADMIN_ID:
+            return await handler(event, data)
+
+        action = self._classify(event, data)
+        if action not in self.limits:
+            return await handler(event, data)
+
+        now = time.monotonic()
+        self._sweep(now)
+
+        bucket = self._buckets.get((user.id, action))
+        if bucket is None:
+            capacity, per_minute = self.limits[action]
+            bucket = TokenBucket(capacity, per_minute, now)
+            self._buckets[(user.id, action)] = bucket
+
+        wait = bucket.consume(now)
+        if not wait:
+            return await handler(event, data)
+
+        # Сообщаем о паузе один раз, повторные нажатия просто игнорируем
+        if now >= bucket.notified_until:
+            bucket.notified_until = now + wait
+            await self._notify(event, wait)
+        elif isinstance(event, CallbackQuery):
+            await event.answer()
+        return None
+
+    @staticmethod
+    def _classify(event: Message | CallbackQuery, data: Dict[str, Any]) -> str:
+        """Определить тип действия: 'navigation', 'start' или 'analyze'"""
+        if isinstance(event, CallbackQuery):
+            if event.data and event.data.startswith("hint_start_"):
+                return 'start'
+            return 'navigation'
+
+        # Импорт здесь, чтобы не создавать циклических импортов при загрузке
+        from client_bot.handlers import CodeSubmission
+        is_command = bool(event.text) and event.text.startswith('/')
+        if data.get('raw_state') == CodeSubmission.waiting_for_code.state and not is_command:
+            return 'analyze'
+        return 'navigation'
+
+    @staticmethod
+    async def _notify(event: Message | CallbackQuery, wait: float) -> None:
+        """Сообщить пользователю о превышении лимита"""
+        text = f"⏳ Слишком много запросов. Попробуйте через {max(1, round(wait))} сек."
+        if isinstance(event, CallbackQuery):
+            await event.answer(text, show_alert=True)
+        else:
+            await event.answer(text)
+
+    def _sweep(self, now: float) -> None:
+        """Удалить корзины пользователей, которые давно неактивны"""
+        if now - self._last_sweep < self.SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        for key in [key for key, bucket in self._buckets.items() if bucket.is_idle(now, self.idle_ttl)]:
+            del self._buckets[key]
+
+
 def admin_only(func):
     """Декоратор для обработчиков доступных только администратору"""
     async def wrapper(event: Message | CallbackQuery, *args, **kwargs):
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Миграции схемы БД
+
+Запуск:
+    python migrate.py           # применить ожидающие миграции
+    python migrate.py status    # показать версию схемы и ожидающие миграции
+    python migrate.py check     # проверить планы запросов CRUD (EXPLAIN QUERY PLAN)
+"""
+
+import sys
+import os
+
+# Добавляем корневую директорию в путь для импортов
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+
+
+def cmd_upgrade() -> int:
+    """Применить ожидающие миграции"""
+    from backend.database import engine
+    from backend.migrations import get_version, upgrade
+
+    applied = upgrade(engine)
+    if applied:
+        print(f"Применены миграции: {', '.join(map(str, applied))}")
+    else:
+        print("Ожидающих миграций нет")
+    print(f"Версия схемы: {get_version(engine)}")
+    return 0
+
+
+def cmd_status() -> int:
+    """Показать версию схемы и ожидающие миграции"""
+    from backend.database import engine
+    from backend.migrations import get_pending, get_version
+
+    print(f"Версия схемы: {get_version(engine)}")
+    pending = get_pending(engine)
+    if not pending:
+        print("Ожидающих миграций нет")
+    for version, description, _statements in pending:
+        print(f"  {version}: {description}")
+    return 0
+
+
+def cmd_check() -> int:
+    """Проверить планы запросов на временной БД"""
+    # Импортируется до backend.database: модуль подменяет DB_PATH
+    from backend.query_plan_check import main
+    return main()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Миграции схемы БД')
+    parser.add_argument('command', nargs='?', default='upgrade',
+                        choices=['upgrade', 'status', 'check'], help='Команда')
+    args = parser.parse_args()
+
+    commands = {'upgrade': cmd_upgrade, 'status': cmd_status, 'check': cmd_check}
+    sys.exit(commands[args.command]())